@@ -5,6 +5,7 @@ from app.core.database import supabase, supabase_admin
 from app.core.security import (
     create_access_token,
     decode_token,
+    revoke_token,
     get_current_user,
     get_password_hash,
     verify_password,
@@ -4,7 +4,7 @@ Loads environment variables and provides settings
 """
 
 from pydantic_settings import BaseSettings
-from functools import lru_cache
+from functools import lru_cache, cached_property
 from typing import List
 import os
 
@@ -22,12 +22,21 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_KEY: str = ""
+    # Connections to the Supabase edge; HTTP/2 multiplexes bursts over these
+    SUPABASE_MAX_CONNECTIONS: int = 20
+    SUPABASE_POOL_TIMEOUT_SECONDS: float = 5.0
     
     # JWT
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # User rows are cached in-process; profile edits may be stale for this long
+    USER_CACHE_TTL_SECONDS: int = 60
+    
+    # Password hashing (lower only for local tests, e.g. BCRYPT_ROUNDS=4)
+    BCRYPT_ROUNDS: int = 12
+    
     # AI Services
     GOOGLE_API_KEY: str = ""
     OPENAI_API_KEY: str = ""
@@ -42,15 +51,16 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
-    @property
+    # Derived values are computed once per settings instance
+    @cached_property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
-    @property
+    @cached_property
     def allowed_file_types_list(self) -> List[str]:
         return [ft.strip() for ft in self.ALLOWED_FILE_TYPES.split(",")]
     
-    @property
+    @cached_property
     def max_file_size_bytes(self) -> int:
         return self.MAX_FILE_SIZE_MB * 1024 * 1024
     
@@ -1,29 +1,298 @@
 """
 SQLite Database - Local database for SIH project
-No external dependencies needed!
+Also provides the shared Supabase clients used by auth and analytics
 """
 
 import sqlite3
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List
-import json
-import uuid
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+import httpx
+import orjson
+from supabase import Client, create_client
+from supabase.lib.client_options import SyncClientOptions
+from app.core.config import settings
 
 # Database file path
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "rakshanetra.db")
 
+# ============== SUPABASE ==============
 
-def get_db_connection() -> sqlite3.Connection:
-    """Get SQLite database connection"""
-    conn = sqlite3.connect(DB_PATH)
+# One keep-alive connection pool shared by every Supabase (PostgREST + Auth)
+# request, instead of a fresh TCP/TLS handshake per client. Supabase pools the
+# Postgres connections behind PostgREST itself, so the app only bounds HTTP
+# connections: HTTP/2 multiplexes concurrent requests over a few of them, and
+# the pool timeout makes bursts fail fast instead of queueing indefinitely.
+supabase_http_client = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_MAX_CONNECTIONS
+    ),
+    timeout=httpx.Timeout(30.0, connect=5.0, pool=settings.SUPABASE_POOL_TIMEOUT_SECONDS),
+    follow_redirects=True
+)
+
+supabase: Client = create_client(
+    settings.SUPABASE_URL,
+    settings.SUPABASE_KEY,
+    options=SyncClientOptions(httpx_client=supabase_http_client)
+)
+
+supabase_admin: Optional[Client] = (
+    create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_SERVICE_KEY,
+        options=SyncClientOptions(httpx_client=supabase_http_client)
+    )
+    if settings.SUPABASE_SERVICE_KEY else None
+)
+
+
+def new_supabase_session_client() -> Client:
+    """
+    Build a throwaway Supabase client for one sign-in/sign-up
+
+    Auth calls store the user's session (and JWT) on the client they run on, so
+    they must never touch the shared `supabase` client - a concurrent request
+    would run its RLS-protected RPCs as the wrong user. The client still reuses
+    the shared HTTP pool.
+    """
+    return create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        options=SyncClientOptions(
+            httpx_client=supabase_http_client,
+            auto_refresh_token=False,
+            persist_session=False
+        )
+    )
+
+
+def warm_supabase_client():
+    """Build the lazy PostgREST client and open a pooled connection before the first login"""
+    supabase.postgrest  # constructed on first access
+    try:
+        supabase_http_client.get(
+            f"{settings.SUPABASE_URL}/auth/v1/health",
+            headers={"apikey": settings.SUPABASE_KEY}
+        )
+    except httpx.HTTPError as e:
+        print(f"⚠️  Supabase warm-up skipped: {e}")
+
+
+def close_supabase_http_client():
+    """Close the shared Supabase HTTP pool (called on shutdown)"""
+    supabase_http_client.close()
+
+
+# ============== SQLITE ==============
+
+# Bump when _create_tables/_create_indexes/_create_search_index change
+SCHEMA_VERSION = 4
+
+# Set by init_database once the incidents_fts search index is known to exist
+_search_index_ready = False
+
+# Crockford base32 alphabet used by ULIDs
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def generate_ulid() -> str:
+    """
+    Generate a ULID (48-bit ms timestamp + 80 random bits, 26 chars)
+    
+    ULIDs sort by creation time, so TEXT primary keys are appended to the
+    right edge of the B-tree instead of random pages like uuid4.
+    """
+    value = ((time.time_ns() // 1_000_000) << 80) | int.from_bytes(os.urandom(10), "big")
+    chars = []
+    for _ in range(26):
+        chars.append(_ULID_ALPHABET[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+# JSON list columns on the incidents table
+JSON_FIELDS = ("indicators", "recommendations", "evidence_files")
+
+
+def _dumps(value: Any) -> str:
+    """Serialize a value to a JSON TEXT column"""
+    return orjson.dumps(value).decode()
+
+
+def _loads_list(raw: Optional[str]) -> List[Any]:
+    """Parse a JSON list column, skipping the parser for NULL/empty lists"""
+    if not raw or raw == "[]":
+        return []
+    return orjson.loads(raw)
+
+
+def _decode_json_fields(incident: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the JSON list columns of an incident row in place"""
+    for field in JSON_FIELDS:
+        incident[field] = _loads_list(incident.get(field))
+    return incident
+
+
+def _decode_summary(incident: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the only JSON column a summary row carries (evidence_files)"""
+    incident["evidence_files"] = _loads_list(incident.get("evidence_files"))
+    return incident
+
+
+# Dashboard stats are polled frequently - serve them from memory briefly
+STATS_CACHE_TTL = 30
+_stats_cache: Optional[tuple] = None
+
+
+def _invalidate_stats_cache():
+    """Drop cached stats after a write to the incidents table"""
+    global _stats_cache
+    _stats_cache = None
+
+
+# User lookups are served from memory for USER_CACHE_TTL_SECONDS
+USER_CACHE_MAX_SIZE = 1024
+_user_cache: Dict[tuple, tuple] = {}
+_user_cache_lock = threading.Lock()
+
+
+def _get_cached_user(key: tuple) -> Optional[Dict[str, Any]]:
+    with _user_cache_lock:
+        cached = _user_cache.get(key)
+    if cached and time.monotonic() - cached[0] < settings.USER_CACHE_TTL_SECONDS:
+        return dict(cached[1])
+    return None
+
+
+def _cache_user(user: Dict[str, Any]):
+    now = time.monotonic()
+    with _user_cache_lock:
+        if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+            _user_cache.clear()
+        _user_cache[("email", user["email"])] = (now, user)
+        _user_cache[("id", user["id"])] = (now, user)
+
+
+def _invalidate_user(email: str = None, user_id: str = None):
+    """Drop a user from the lookup cache after it is created or changed"""
+    with _user_cache_lock:
+        _user_cache.pop(("email", email), None)
+        _user_cache.pop(("id", user_id), None)
+
+
+# Prepared statements kept alive per pooled connection
+STATEMENT_CACHE_SIZE = 256
+
+# Rows pulled from SQLite per fetchmany() batch when streaming
+FETCH_ARRAY_SIZE = 200
+
+# Connection pool - connections are opened once and reused across requests
+POOL_SIZE = 8
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=POOL_SIZE)
+
+# PRAGMAs applied once to every new pooled connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+)
+
+
+def _configure_connection(conn: sqlite3.Connection) -> None:
+    """Apply row factory and performance PRAGMAs to a fresh connection"""
     conn.row_factory = sqlite3.Row  # Access columns by name
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+
+def _open_connection() -> sqlite3.Connection:
+    """Open a new autocommit connection that may be shared across threads"""
+    conn = sqlite3.connect(
+        DB_PATH,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    _configure_connection(conn)
     return conn
 
 
+@contextmanager
+def get_db_connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled SQLite connection, returning it to the pool afterwards"""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _open_connection()
+    
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def close_all_connections():
+    """Close every idle pooled connection (called on shutdown)"""
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
 def init_database():
-    """Initialize database tables"""
-    conn = get_db_connection()
+    """
+    Initialize database tables (idempotent and safe across workers)
+    
+    The schema version is stamped into PRAGMA user_version. Workers that find
+    it current return immediately; otherwise BEGIN IMMEDIATE serializes them
+    so only the first one creates the schema.
+    """
+    global _search_index_ready
+    with get_db_connection() as conn:
+        if _schema_version(conn) >= SCHEMA_VERSION:
+            _search_index_ready = _has_search_index(conn)
+            return
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if _schema_version(conn) < SCHEMA_VERSION:
+                _create_tables(conn)
+                _add_missing_columns(conn)
+                _create_indexes(conn)
+                _create_search_index(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        # Refresh planner statistics so the new indexes are picked up
+        conn.execute("ANALYZE")
+        _search_index_ready = _has_search_index(conn)
+    print(f"✅ Database initialized at: {DB_PATH}")
+
+
+def _create_tables(conn: sqlite3.Connection):
+    """Create application tables if they do not already exist"""
     cursor = conn.cursor()
     
     # Users table
@@ -82,29 +351,200 @@ def init_database():
             created_at TEXT DEFAULT CURRENT_TIMESTAMP
         )
     """)
+
+
+# Columns added to incidents after the original schema - (name, definition)
+INCIDENT_ADDED_COLUMNS = (
+    ("analysis_status", "TEXT DEFAULT 'ready'"),  # pending / ready / failed
+)
+
+
+def _add_missing_columns(conn: sqlite3.Connection):
+    """Add columns introduced by later schema versions to an existing incidents table"""
+    existing_columns = {row[1] for row in conn.execute("PRAGMA table_info(incidents)")}
     
-    conn.commit()
-    conn.close()
-    print(f"✅ Database initialized at: {DB_PATH}")
+    for col_name, col_type in INCIDENT_ADDED_COLUMNS:
+        if col_name not in existing_columns:
+            conn.execute(f"ALTER TABLE incidents ADD COLUMN {col_name} {col_type}")
+
+
+def _create_indexes(conn: sqlite3.Connection):
+    """
+    Create indexes backing the incident listing and stats queries
+    
+    An incidents table created by another schema (e.g. server.py's, which has
+    no reported_by) just goes without the indexes it lacks columns for -
+    they are optional and must not abort startup.
+    """
+    indexes = [
+        ("idx_incidents_created", ("created_at DESC",)),
+        ("idx_incidents_reporter_created", ("reported_by", "created_at DESC")),
+        ("idx_incidents_filter", ("reported_by", "status", "severity", "type", "created_at DESC")),
+        ("idx_incidents_severity", ("severity",)),
+        ("idx_incidents_status", ("status",)),
+        ("idx_incidents_type", ("type",)),
+    ]
+    existing_columns = {row[1] for row in conn.execute("PRAGMA table_info(incidents)")}
+    
+    for idx_name, columns in indexes:
+        missing = [col.split()[0] for col in columns if col.split()[0] not in existing_columns]
+        if missing:
+            print(f"⚠️  Skipping index {idx_name}: incidents has no {', '.join(missing)} column")
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {idx_name} ON incidents({', '.join(columns)})")
+
+
+def _has_search_index(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'incidents_fts'"
+    ).fetchone() is not None
+
+
+def _create_search_index(conn: sqlite3.Connection):
+    """
+    Create the trigram full-text index used by the listing search
+    
+    Triggers keep it in step with incidents. Needs FTS5 with the trigram
+    tokenizer (SQLite 3.34+); without it searches fall back to LIKE scans.
+    """
+    if _has_search_index(conn):
+        return
+    
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE incidents_fts USING fts5(id, content, description, tokenize = 'trigram')"
+        )
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Full-text search unavailable, using LIKE: {e}")
+        return
+    
+    # Deletes and edits of these columns are rare (admin tooling), so the
+    # unindexed id lookup in those triggers is acceptable
+    triggers = [
+        """
+        CREATE TRIGGER incidents_fts_insert AFTER INSERT ON incidents BEGIN
+            INSERT INTO incidents_fts (id, content, description)
+            VALUES (new.id, new.content, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER incidents_fts_delete AFTER DELETE ON incidents BEGIN
+            DELETE FROM incidents_fts WHERE id = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER incidents_fts_update AFTER UPDATE OF id, content, description ON incidents BEGIN
+            DELETE FROM incidents_fts WHERE id = old.id;
+            INSERT INTO incidents_fts (id, content, description)
+            VALUES (new.id, new.content, new.description);
+        END
+        """,
+    ]
+    for trigger in triggers:
+        conn.execute(trigger)
+    conn.execute(
+        "INSERT INTO incidents_fts (id, content, description) "
+        "SELECT id, content, description FROM incidents"
+    )
+
+
+# ============== SQL STATEMENTS ==============
+# Hot-path statements are module constants so every call hands sqlite3 the
+# same SQL text and hits the per-connection prepared statement cache.
+
+USER_INSERT_SQL = (
+    "INSERT INTO users (id, email, password_hash, full_name, role, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+USER_BY_EMAIL_SQL = "SELECT * FROM users WHERE email = ?"
+USER_BY_ID_SQL = "SELECT * FROM users WHERE id = ?"
+
+INCIDENT_INSERT_SQL = (
+    "INSERT INTO incidents ("
+    "id, type, content, description, risk_score, severity, status, "
+    "indicators, recommendations, evidence_files, reported_by, "
+    "location, ip_address, user_agent, analysis_status, created_at, updated_at"
+    ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# Explicit projections - the migration script adds extra columns to incidents
+# that none of these read paths need
+INCIDENT_COLUMNS = (
+    "id, type, content, description, risk_score, severity, status, "
+    "indicators, recommendations, evidence_files, reported_by, assigned_to, "
+    "location, ip_address, user_agent, analysis_status, created_at, updated_at, resolved_at"
+)
+# Listing views render no indicators/recommendations/request metadata and
+# only a one-line preview of the free-text fields (detail views load them in full)
+LIST_PREVIEW_LENGTH = 140
+INCIDENT_SUMMARY_COLUMNS = (
+    f"id, type, substr(content, 1, {LIST_PREVIEW_LENGTH}) AS content, "
+    f"substr(description, 1, {LIST_PREVIEW_LENGTH}) AS description, "
+    "risk_score, severity, status, analysis_status, evidence_files, reported_by, location, "
+    "created_at, updated_at"
+)
+# The listing API's row shape, built by SQLite so rows need no reformatting
+# in Python (short display id, first evidence file, reporter fallback)
+INCIDENT_LISTING_COLUMNS = (
+    "id, substr(id, 1, 18) AS incident_id, type, "
+    f"substr(content, 1, {LIST_PREVIEW_LENGTH}) AS content, "
+    "json_extract(evidence_files, '$[0]') AS file_url, "
+    f"substr(description, 1, {LIST_PREVIEW_LENGTH}) AS description, "
+    "location, risk_score, severity, status, "
+    "COALESCE(NULLIF(analysis_status, ''), 'ready') AS analysis_status, "
+    "created_at, updated_at, "
+    "COALESCE(NULLIF(reported_by, ''), 'Anonymous Reporter') AS reported_by"
+)
+
+INCIDENT_BY_ID_SQL = f"SELECT {INCIDENT_COLUMNS} FROM incidents WHERE id = ?"
+INCIDENTS_PAGE_SQL = (
+    f"SELECT {INCIDENT_COLUMNS} FROM incidents ORDER BY created_at DESC LIMIT ? OFFSET ?"
+)
+USER_INCIDENTS_SQL = (
+    f"SELECT {INCIDENT_COLUMNS} FROM incidents "
+    "WHERE reported_by = ? ORDER BY created_at DESC LIMIT ?"
+)
+INCIDENTS_SUMMARY_PAGE_SQL = (
+    f"SELECT {INCIDENT_SUMMARY_COLUMNS} FROM incidents "
+    "ORDER BY created_at DESC LIMIT ? OFFSET ?"
+)
+USER_INCIDENTS_SUMMARY_SQL = (
+    f"SELECT {INCIDENT_SUMMARY_COLUMNS} FROM incidents "
+    "WHERE reported_by = ? ORDER BY created_at DESC LIMIT ?"
+)
+# Equality filters accepted by the listing query, mapped to their columns
+INCIDENT_FILTER_COLUMNS = {
+    "reported_by": "reported_by",
+    "status": "status",
+    "severity": "severity",
+    "type": "type",
+}
+# Columns matched by the listing free-text search
+INCIDENT_SEARCH_COLUMNS = ("content", "description", "id")
+# Trigrams need at least three characters; shorter searches use LIKE
+FTS_MIN_SEARCH_LENGTH = 3
+INCIDENT_FTS_CLAUSE = "id IN (SELECT id FROM incidents_fts WHERE incidents_fts MATCH ?)"
+INCIDENT_STATUS_UPDATE_SQL = (
+    "UPDATE incidents SET status = ?, updated_at = ?, resolved_at = ? WHERE id = ?"
+)
+INCIDENT_ANALYSIS_UPDATE_SQL = (
+    "UPDATE incidents SET risk_score = ?, severity = ?, indicators = ?, "
+    "recommendations = ?, analysis_status = 'ready', updated_at = ? WHERE id = ?"
+)
+INCIDENT_ANALYSIS_STATUS_UPDATE_SQL = (
+    "UPDATE incidents SET analysis_status = ?, updated_at = ? WHERE id = ?"
+)
 
 
 # ============== USER OPERATIONS ==============
 
 def create_user(email: str, password_hash: str, full_name: str = None, role: str = "citizen") -> Dict[str, Any]:
     """Create a new user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    user_id = str(uuid.uuid4())
+    user_id = generate_ulid()
     now = datetime.utcnow().isoformat()
     
-    cursor.execute("""
-        INSERT INTO users (id, email, password_hash, full_name, role, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (user_id, email, password_hash, full_name, role, now, now))
-    
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute(USER_INSERT_SQL, (user_id, email, password_hash, full_name, role, now, now))
+    _invalidate_user(email=email, user_id=user_id)
     
     return {
         "id": user_id,
@@ -115,55 +555,42 @@ def create_user(email: str, password_hash: str, full_name: str = None, role: str
 
 
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-    """Get user by email"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Get user by email (cached briefly)"""
+    cached = _get_cached_user(("email", email))
+    if cached:
+        return cached
     
-    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-    row = cursor.fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        row = conn.execute(USER_BY_EMAIL_SQL, (email,)).fetchone()
     
     if row:
-        return dict(row)
+        user = dict(row)
+        _cache_user(user)
+        return dict(user)
     return None
 
 
 def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
-    """Get user by ID"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Get user by ID (cached briefly)"""
+    cached = _get_cached_user(("id", user_id))
+    if cached:
+        return cached
     
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        row = conn.execute(USER_BY_ID_SQL, (user_id,)).fetchone()
     
     if row:
-        return dict(row)
+        user = dict(row)
+        _cache_user(user)
+        return dict(user)
     return None
 
 
 # ============== INCIDENT OPERATIONS ==============
 
-def create_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a new incident"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    incident_id = str(uuid.uuid4())
-    now = datetime.utcnow().isoformat()
-    
-    # Convert lists to JSON strings
-    indicators = json.dumps(incident_data.get("indicators", []))
-    recommendations = json.dumps(incident_data.get("recommendations", []))
-    evidence_files = json.dumps(incident_data.get("evidence_files", []))
-    
-    cursor.execute("""
-        INSERT INTO incidents (
-            id, type, content, description, risk_score, severity, status,
-            indicators, recommendations, evidence_files, reported_by,
-            location, ip_address, user_agent, created_at, updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+def _incident_row(incident_id: str, incident_data: Dict[str, Any], now: str) -> tuple:
+    """Build the INSERT parameter tuple for one incident (lists stored as JSON)"""
+    return (
         incident_id,
         incident_data.get("type"),
         incident_data.get("content"),
@@ -171,19 +598,27 @@ def create_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
         incident_data.get("risk_score", 0),
         incident_data.get("severity", "unknown"),
         incident_data.get("status", "pending"),
-        indicators,
-        recommendations,
-        evidence_files,
+        _dumps(incident_data.get("indicators", [])),
+        _dumps(incident_data.get("recommendations", [])),
+        _dumps(incident_data.get("evidence_files", [])),
         incident_data.get("reported_by"),
         incident_data.get("location"),
         incident_data.get("ip_address"),
         incident_data.get("user_agent"),
+        incident_data.get("analysis_status", "ready"),
         now,
         now
-    ))
+    )
+
+
+def create_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a new incident"""
+    incident_id = generate_ulid()
+    now = datetime.utcnow().isoformat()
     
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute(INCIDENT_INSERT_SQL, _incident_row(incident_id, incident_data, now))
+    _invalidate_stats_cache()
     
     return {
         "id": incident_id,
@@ -193,131 +628,224 @@ def create_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def create_incidents_bulk(incidents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Create many incidents in a single transaction (one fsync per batch)"""
+    if not incidents:
+        return []
+    
+    now = datetime.utcnow().isoformat()
+    incident_ids = [generate_ulid() for _ in incidents]
+    rows = [
+        _incident_row(incident_id, incident_data, now)
+        for incident_id, incident_data in zip(incident_ids, incidents)
+    ]
+    
+    with get_db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(INCIDENT_INSERT_SQL, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    _invalidate_stats_cache()
+    
+    return [
+        {"id": incident_id, **incident_data, "created_at": now, "updated_at": now}
+        for incident_id, incident_data in zip(incident_ids, incidents)
+    ]
+
+
 def get_incident_by_id(incident_id: str) -> Optional[Dict[str, Any]]:
     """Get incident by ID"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM incidents WHERE id = ?", (incident_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        row = conn.execute(INCIDENT_BY_ID_SQL, (incident_id,)).fetchone()
     
     if row:
-        incident = dict(row)
         # Parse JSON fields
-        incident["indicators"] = json.loads(incident.get("indicators") or "[]")
-        incident["recommendations"] = json.loads(incident.get("recommendations") or "[]")
-        incident["evidence_files"] = json.loads(incident.get("evidence_files") or "[]")
-        return incident
+        return _decode_json_fields(dict(row))
     return None
 
 
 def get_all_incidents(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
     """Get all incidents with pagination"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT * FROM incidents 
-        ORDER BY created_at DESC 
-        LIMIT ? OFFSET ?
-    """, (limit, offset))
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
-    incidents = []
-    for row in rows:
-        incident = dict(row)
-        incident["indicators"] = json.loads(incident.get("indicators") or "[]")
-        incident["recommendations"] = json.loads(incident.get("recommendations") or "[]")
-        incident["evidence_files"] = json.loads(incident.get("evidence_files") or "[]")
-        incidents.append(incident)
+    with get_db_connection() as conn:
+        rows = conn.execute(INCIDENTS_PAGE_SQL, (limit, offset)).fetchall()
     
-    return incidents
+    return [_decode_json_fields(dict(row)) for row in rows]
 
 
 def get_user_incidents(user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
     """Get incidents reported by a specific user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with get_db_connection() as conn:
+        rows = conn.execute(USER_INCIDENTS_SQL, (user_id, limit)).fetchall()
     
-    cursor.execute("""
-        SELECT * FROM incidents 
-        WHERE reported_by = ? 
-        ORDER BY created_at DESC 
-        LIMIT ?
-    """, (user_id, limit))
+    return [_decode_json_fields(dict(row)) for row in rows]
+
+
+def _iter_rows(sql: str, params: tuple, decode) -> Iterator[Dict[str, Any]]:
+    """Yield decoded rows as they are fetched instead of materializing a list"""
+    with get_db_connection() as conn:
+        cursor = conn.execute(sql, params)
+        cursor.arraysize = FETCH_ARRAY_SIZE
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for row in rows:
+                yield decode(dict(row))
+
+
+def iter_all_incidents_summary(limit: int = 100, offset: int = 0) -> Iterator[Dict[str, Any]]:
+    """Stream listing-view incident rows with pagination (no analysis columns)"""
+    return _iter_rows(INCIDENTS_SUMMARY_PAGE_SQL, (limit, offset), _decode_summary)
+
+
+def iter_user_incidents_summary(user_id: str, limit: int = 100) -> Iterator[Dict[str, Any]]:
+    """Stream listing-view incident rows reported by a specific user"""
+    return _iter_rows(USER_INCIDENTS_SUMMARY_SQL, (user_id, limit), _decode_summary)
+
+
+def get_all_incidents_summary(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    """Get listing-view incident rows with pagination (no analysis columns)"""
+    return list(iter_all_incidents_summary(limit, offset))
+
+
+def get_user_incidents_summary(user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """Get listing-view incident rows reported by a specific user"""
+    return list(iter_user_incidents_summary(user_id, limit))
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so search text is matched literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def query_incidents_summary(
+    filters: Dict[str, Any],
+    search: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Filter, count and page listing-view incident rows entirely in SQLite
+    
+    Returns the requested page, already in the listing API's shape
+    (INCIDENT_LISTING_COLUMNS), plus the total number of matching rows.
+    """
+    clauses = []
+    params: List[Any] = []
+    for key, value in filters.items():
+        if value is not None:
+            clauses.append(f"{INCIDENT_FILTER_COLUMNS[key]} = ?")
+            params.append(value)
+    
+    if search and _search_index_ready and len(search) >= FTS_MIN_SEARCH_LENGTH:
+        # Quoted as one phrase: a case-insensitive substring match, same as LIKE
+        clauses.append(INCIDENT_FTS_CLAUSE)
+        params.append('"' + search.replace('"', '""') + '"')
+    elif search:
+        pattern = f"%{_escape_like(search)}%"
+        clauses.append(
+            "(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in INCIDENT_SEARCH_COLUMNS) + ")"
+        )
+        params.extend([pattern] * len(INCIDENT_SEARCH_COLUMNS))
     
-    rows = cursor.fetchall()
-    conn.close()
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
     
-    incidents = []
-    for row in rows:
-        incident = dict(row)
-        incident["indicators"] = json.loads(incident.get("indicators") or "[]")
-        incident["recommendations"] = json.loads(incident.get("recommendations") or "[]")
-        incident["evidence_files"] = json.loads(incident.get("evidence_files") or "[]")
-        incidents.append(incident)
+    with get_db_connection() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM incidents{where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {INCIDENT_LISTING_COLUMNS} FROM incidents{where} "
+            "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset)
+        ).fetchall() if total > offset else []
     
-    return incidents
+    return [dict(row) for row in rows], total
 
 
 def update_incident_status(incident_id: str, status: str) -> bool:
     """Update incident status"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     now = datetime.utcnow().isoformat()
     resolved_at = now if status == "resolved" else None
     
-    cursor.execute("""
-        UPDATE incidents 
-        SET status = ?, updated_at = ?, resolved_at = ?
-        WHERE id = ?
-    """, (status, now, resolved_at, incident_id))
-    
-    conn.commit()
-    affected = cursor.rowcount
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.execute(INCIDENT_STATUS_UPDATE_SQL, (status, now, resolved_at, incident_id))
+        affected = cursor.rowcount
+    _invalidate_stats_cache()
     
     return affected > 0
 
 
-def get_incident_stats() -> Dict[str, Any]:
-    """Get incident statistics"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Total incidents
-    cursor.execute("SELECT COUNT(*) FROM incidents")
-    total = cursor.fetchone()[0]
-    
-    # By severity
-    cursor.execute("SELECT severity, COUNT(*) FROM incidents GROUP BY severity")
-    by_severity = {row[0]: row[1] for row in cursor.fetchall()}
-    
-    # By status
-    cursor.execute("SELECT status, COUNT(*) FROM incidents GROUP BY status")
-    by_status = {row[0]: row[1] for row in cursor.fetchall()}
+def attach_incident_analysis(incident_id: str, analysis_data: Dict[str, Any]) -> bool:
+    """Store AI analysis results on an incident inserted before analysis finished"""
+    now = datetime.utcnow().isoformat()
     
-    # By type
-    cursor.execute("SELECT type, COUNT(*) FROM incidents GROUP BY type")
-    by_type = {row[0]: row[1] for row in cursor.fetchall()}
+    with get_db_connection() as conn:
+        cursor = conn.execute(INCIDENT_ANALYSIS_UPDATE_SQL, (
+            analysis_data.get("risk_score", 0),
+            analysis_data.get("severity", "unknown"),
+            _dumps(analysis_data.get("indicators", [])),
+            _dumps(analysis_data.get("recommendations", [])),
+            now,
+            incident_id
+        ))
+        affected = cursor.rowcount
+    _invalidate_stats_cache()
     
-    # Recent 7 days
-    cursor.execute("""
-        SELECT DATE(created_at), COUNT(*) 
-        FROM incidents 
-        WHERE created_at >= DATE('now', '-7 days')
-        GROUP BY DATE(created_at)
-        ORDER BY DATE(created_at)
-    """)
-    recent_trend = [{"date": row[0], "count": row[1]} for row in cursor.fetchall()]
+    return affected > 0
+
+
+def set_incident_analysis_status(incident_id: str, analysis_status: str) -> bool:
+    """Record that an incident's analysis is pending, ready or failed"""
+    now = datetime.utcnow().isoformat()
     
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.execute(INCIDENT_ANALYSIS_STATUS_UPDATE_SQL, (analysis_status, now, incident_id))
+        affected = cursor.rowcount
     
-    return {
+    return affected > 0
+
+
+def get_incident_stats() -> Dict[str, Any]:
+    """Get incident statistics (cached for STATS_CACHE_TTL seconds)"""
+    global _stats_cache
+    
+    cached = _stats_cache
+    if cached and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+        return cached[1]
+    
+    with get_db_connection() as conn:
+        # Single scan: fold severity/status/type counts from one grouped pass
+        rows = conn.execute("""
+            SELECT severity, status, type, COUNT(*)
+            FROM incidents
+            GROUP BY severity, status, type
+        """).fetchall()
+        
+        # Recent 7 days
+        recent_trend = [
+            {"date": row[0], "count": row[1]}
+            for row in conn.execute("""
+                SELECT DATE(created_at), COUNT(*) 
+                FROM incidents 
+                WHERE created_at >= DATE('now', '-7 days')
+                GROUP BY DATE(created_at)
+                ORDER BY DATE(created_at)
+            """)
+        ]
+    
+    total = 0
+    by_severity: Dict[str, int] = {}
+    by_status: Dict[str, int] = {}
+    by_type: Dict[str, int] = {}
+    for severity, status, incident_type, count in rows:
+        total += count
+        by_severity[severity] = by_severity.get(severity, 0) + count
+        by_status[status] = by_status.get(status, 0) + count
+        by_type[incident_type] = by_type.get(incident_type, 0) + count
+    
+    stats = {
         "total_incidents": total,
         "by_severity": by_severity,
         "by_status": by_status,
@@ -327,7 +855,5 @@ def get_incident_stats() -> Dict[str, Any]:
         "pending_count": by_status.get("pending", 0),
         "resolved_count": by_status.get("resolved", 0)
     }
-
-
-# Initialize database on module load
-init_database()
+    _stats_cache = (time.monotonic(), stats)
+    return stats
@@ -0,0 +1,73 @@
+"""
+Logging setup - records are queued on the request path and written by a background thread
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Chatty client libraries (one record per HTTP request / HTTP2 frame)
+QUIET_LOGGERS = ("httpx", "httpcore", "hpack", "h2", "multipart")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RateSampler(logging.Filter):
+    """
+    Let the first `burst` records through each second, then only 1 in `sample_rate`
+    
+    Keeps error storms (e.g. credential stuffing) from flooding the log.
+    """
+    
+    def __init__(self, burst: int = 10, sample_rate: int = 100):
+        super().__init__()
+        self.burst = burst
+        self.sample_rate = sample_rate
+        self._window = 0
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        window = int(time.monotonic())
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._count = 0
+            self._count += 1
+            count = self._count
+        return count <= self.burst or count % self.sample_rate == 0
+
+
+def setup_logging(level: int = logging.INFO):
+    """Route all logging through a QueueHandler drained to stderr by a listener thread"""
+    global _listener
+    if _listener is not None:
+        return
+    
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread (called on shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
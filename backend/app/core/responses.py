@@ -0,0 +1,14 @@
+"""
+Response classes - orjson-backed JSON rendering
+"""
+
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (native datetime/enum support, much faster than json.dumps)"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
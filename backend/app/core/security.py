@@ -2,67 +2,130 @@
 Security utilities - JWT, password hashing, auth
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional, Dict, Any, Tuple
+import bcrypt
+import jwt
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt only uses the first 72 bytes of a password
+BCRYPT_MAX_PASSWORD_BYTES = 72
 
 # Bearer token security
 security = HTTPBearer()
 
+# HMAC key bytes and default token lifetime, computed once instead of per token
+_JWT_SIGNING_KEY = settings.JWT_SECRET_KEY.encode("utf-8")
+_ACCESS_TOKEN_TTL_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# Decoded JWT cache: token digest -> (exp timestamp, payload). Tokens are
+# signed and immutable, so a verified payload stays valid until it expires.
+TOKEN_CACHE_MAX_SIZE = 10000
+_token_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# Logged-out tokens: token digest -> exp timestamp (dropped once expired)
+_revoked_tokens: Dict[bytes, float] = {}
+_token_cache_lock = threading.Lock()
+
+
+def _token_key(token: str) -> bytes:
+    """Short fixed-size cache key for a raw token"""
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+
+def _password_bytes(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode("utf-8"))
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(_password_bytes(password), salt).decode("utf-8")
+
+
+def _token_expiry(expires_delta: Optional[timedelta] = None) -> int:
+    """Epoch-seconds exp claim for a token issued now"""
+    ttl = expires_delta.total_seconds() if expires_delta else _ACCESS_TOKEN_TTL_SECONDS
+    return int(time.time() + ttl)
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
+    to_encode["exp"] = _token_expiry(expires_delta)
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return jwt.encode(to_encode, _JWT_SIGNING_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def _decode_raw(token: str) -> Optional[Dict[str, Any]]:
+    """Decode a JWT, returning None if it is invalid, expired or revoked (cached until expiry)"""
+    now = time.time()
+    key = _token_key(token)
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.JWT_SECRET_KEY, 
-        algorithm=settings.JWT_ALGORITHM
-    )
-    return encoded_jwt
+    with _token_cache_lock:
+        if key in _revoked_tokens:
+            return None
+        cached = _token_cache.get(key)
+        if cached:
+            if cached[0] > now:
+                _token_cache.move_to_end(key)
+                return cached[1]
+            del _token_cache[key]
+    
+    try:
+        payload = jwt.decode(token, _JWT_SIGNING_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    
+    expires_at = payload.get("exp")
+    if expires_at:
+        with _token_cache_lock:
+            _token_cache[key] = (float(expires_at), payload)
+            if len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+                _token_cache.popitem(last=False)
+    
+    return payload
 
 
 def decode_token(token: str) -> Dict[str, Any]:
     """Decode and validate JWT token"""
-    try:
-        payload = jwt.decode(
-            token, 
-            settings.JWT_SECRET_KEY, 
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
-    except JWTError:
+    payload = _decode_raw(token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
+
+
+def revoke_token(token: str):
+    """Reject a token for the rest of its lifetime in this process (e.g. on logout)"""
+    key = _token_key(token)
+    now = time.time()
+    
+    with _token_cache_lock:
+        cached = _token_cache.pop(key, None)
+        expires_at = cached[0] if cached else now + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        _revoked_tokens[key] = expires_at
+        
+        # Forget revocations for tokens that have expired anyway
+        for expired in [k for k, exp in _revoked_tokens.items() if exp <= now]:
+            del _revoked_tokens[expired]
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
     """Get current user from JWT token"""
@@ -76,6 +139,9 @@ async def get_current_user(
             detail="Invalid token payload",
         )
     
+    # Handlers derive cache validators (ETags) from the token digest
+    request.state.token_digest = _token_key(token)
+    
     return {
         "id": user_id,
         "email": payload.get("email"),
@@ -84,39 +150,35 @@ async def get_current_user(
     }
 
 
+ANONYMOUS_USER = {
+    "id": "anonymous",
+    "email": "anonymous@guest.local",
+    "role": "reporter",
+    "name": "Anonymous Reporter"
+}
+
+
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
 ) -> Optional[Dict[str, Any]]:
-    """Get current user from JWT token (optional - returns None if no token)"""
+    """Get current user from JWT token (optional - anonymous if no/invalid token)"""
     if not credentials:
-        return {
-            "id": "anonymous",
-            "email": "anonymous@guest.local",
-            "role": "reporter",
-            "name": "Anonymous Reporter"
-        }
+        return dict(ANONYMOUS_USER)
     
-    try:
-        token = credentials.credentials
-        payload = decode_token(token)
-        
-        user_id = payload.get("sub")
-        if not user_id:
-            return None
-        
-        return {
-            "id": user_id,
-            "email": payload.get("email"),
-            "role": payload.get("role", "reporter"),
-            "name": payload.get("name")
-        }
-    except:
-        return {
-            "id": "anonymous",
-            "email": "anonymous@guest.local",
-            "role": "reporter",
-            "name": "Anonymous Reporter"
-        }
+    payload = _decode_raw(credentials.credentials)
+    if payload is None:
+        return dict(ANONYMOUS_USER)
+    
+    user_id = payload.get("sub")
+    if not user_id:
+        return None
+    
+    return {
+        "id": user_id,
+        "email": payload.get("email"),
+        "role": payload.get("role", "reporter"),
+        "name": payload.get("name")
+    }
 
 
 async def require_role(required_roles: list):
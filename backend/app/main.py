@@ -6,14 +6,28 @@ Smart India Hackathon 2025 | Team Urban Dons
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import time
 
 from app.core.config import settings
+from app.core.logger import setup_logging, stop_logging
+from app.core.responses import ORJSONResponse
+from app.core.database import (
+    init_database,
+    close_all_connections,
+    warm_supabase_client,
+    close_supabase_http_client
+)
+from app.services.ai_analyzer import close_ai_http_client
 from app.routes import auth_router, incidents_router, analytics_router
 
 
+setup_logging(logging.DEBUG if settings.DEBUG else logging.INFO)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
@@ -21,9 +35,17 @@ async def lifespan(app: FastAPI):
     print(f"🛡️  {settings.APP_NAME} v{settings.APP_VERSION} starting...")
     print(f"📍 Environment: {settings.APP_ENV}")
     print(f"🔗 CORS Origins: {settings.cors_origins_list}")
+    await asyncio.to_thread(init_database)
+    # Prime the Supabase client and its connection pool without delaying startup
+    warmup = asyncio.create_task(asyncio.to_thread(warm_supabase_client))
     yield
+    await warmup
     # Shutdown
+    close_all_connections()
+    close_supabase_http_client()
+    await close_ai_http_client()
     print(f"🛡️  {settings.APP_NAME} shutting down...")
+    stop_logging()
 
 
 # Create FastAPI application
@@ -48,6 +70,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -60,21 +83,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON bodies (incident lists, analytics) - small ones aren't worth it
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
-# Request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+
+# Request timing middleware (pure ASGI - no BaseHTTPMiddleware wrapper)
+class TimingMiddleware:
+    """Adds an X-Process-Time header (seconds) to every HTTP response"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_ns = time.perf_counter_ns()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                process_time = (time.perf_counter_ns() - start_ns) / 1e9
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", str(process_time).encode()))
+                message["headers"] = headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_timing)
+
+
+# Only pay for timing in development
+if settings.DEBUG:
+    app.add_middleware(TimingMiddleware)
 
 
 # Exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "detail": "Internal server error",
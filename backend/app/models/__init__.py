@@ -5,6 +5,7 @@ from app.models.schemas import (
     IncidentType,
     SeverityLevel,
     IncidentStatus,
+    AnalysisStatus,
     UserRole,
     
     # Auth
@@ -19,6 +20,7 @@ from app.models.schemas import (
     IncidentListResponse,
     IncidentWithAnalysis,
     SubmitIncidentResponse,
+    BulkSubmitIncidentResponse,
     
     # Analysis
     AnalysisResult,
@@ -32,3 +34,4 @@ from app.models.schemas import (
     MessageResponse,
     ErrorResponse
 )
+from app.models.internal import IncidentRecord, AnalysisRecord, to_model
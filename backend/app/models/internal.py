@@ -0,0 +1,42 @@
+"""
+Internal msgspec structs for service-layer plumbing
+Pydantic models in schemas.py stay at the FastAPI I/O boundary
+"""
+
+import msgspec
+from typing import Optional, List, Annotated
+from datetime import datetime
+from app.models.schemas import IncidentType, SeverityLevel, IncidentStatus, AnalysisStatus
+
+
+class IncidentRecord(msgspec.Struct, kw_only=True):
+    """Incident row as passed between the database, services and routes"""
+    id: str
+    incident_id: str
+    type: IncidentType
+    content: Optional[str] = None
+    file_url: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    risk_score: int = 0
+    severity: SeverityLevel = SeverityLevel.LOW
+    status: IncidentStatus = IncidentStatus.PENDING
+    analysis_status: AnalysisStatus = AnalysisStatus.READY
+    created_at: datetime
+    updated_at: datetime
+    reported_by: Optional[str] = None
+
+
+class AnalysisRecord(msgspec.Struct, kw_only=True):
+    """Stored analysis for an incident"""
+    risk_score: Annotated[int, msgspec.Meta(ge=0, le=100)]
+    severity: SeverityLevel
+    summary: str
+    indicators: List[str]
+    recommendations: List[str]
+    iocs: List[str] = []
+
+
+def to_model(model_cls, record: msgspec.Struct):
+    """Build a pydantic response model from an already-validated struct"""
+    return model_cls.model_construct(**msgspec.structs.asdict(record))
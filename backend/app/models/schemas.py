@@ -32,6 +32,12 @@ class IncidentStatus(str, Enum):
     RESOLVED = "resolved"
 
 
+class AnalysisStatus(str, Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+
 class UserRole(str, Enum):
     REPORTER = "reporter"
     ANALYST = "analyst"
@@ -95,6 +101,7 @@ class IncidentResponse(BaseModel):
     risk_score: int = 0
     severity: SeverityLevel = SeverityLevel.LOW
     status: IncidentStatus = IncidentStatus.PENDING
+    analysis_status: AnalysisStatus = AnalysisStatus.READY
     created_at: datetime
     updated_at: datetime
     reported_by: Optional[str] = None
@@ -131,8 +138,18 @@ class IncidentWithAnalysis(BaseModel):
 class SubmitIncidentResponse(BaseModel):
     success: bool
     incident_id: str
+    id: Optional[str] = None  # Database ID for polling /incidents/{id}/analysis
+    message: str
+    analysis_status: AnalysisStatus = AnalysisStatus.READY
+    analysis: Optional[AnalysisResult] = None
+
+
+class BulkSubmitIncidentResponse(BaseModel):
+    success: bool
+    total_submitted: int
+    incident_ids: List[str]
+    ids: List[str] = []  # Database IDs, in the same order as incident_ids
     message: str
-    analysis: AnalysisResult
 
 
 # ================================
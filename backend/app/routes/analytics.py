@@ -5,7 +5,7 @@ Handles trends, statistics, and reporting
 
 from fastapi import APIRouter, Depends
 from app.core.security import get_analyst_or_admin
-from app.models.schemas import TrendsResponse, StatsResponse, RiskDistribution
+from app.models.schemas import TrendsResponse, TrendDataPoint, StatsResponse, RiskDistribution
 from app.services.analytics_service import (
     get_incident_stats,
     get_trends,
@@ -21,7 +21,13 @@ async def get_stats(current_user: dict = Depends(get_analyst_or_admin)):
     Get incident statistics (Admins only)
     """
     stats = await get_incident_stats()
-    return StatsResponse(**stats)
+    # Service output is trusted - skip re-validation
+    return StatsResponse.model_construct(
+        **{
+            **stats,
+            "risk_distribution": RiskDistribution.model_construct(**stats["risk_distribution"])
+        }
+    )
 
 
 @router.get("/trends", response_model=TrendsResponse)
@@ -38,7 +44,12 @@ async def get_incident_trends(
         period = "7d"
     
     trends = await get_trends(period)
-    return TrendsResponse(**trends)
+    return TrendsResponse.model_construct(
+        **{
+            **trends,
+            "data": [TrendDataPoint.model_construct(**point) for point in trends["data"]]
+        }
+    )
 
 
 @router.get("/risk-distribution", response_model=RiskDistribution)
@@ -47,4 +58,4 @@ async def get_risk_dist(current_user: dict = Depends(get_analyst_or_admin)):
     Get distribution of incidents by severity
     """
     distribution = await get_risk_distribution()
-    return RiskDistribution(**distribution)
+    return RiskDistribution.model_construct(**distribution)
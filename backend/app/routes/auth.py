@@ -3,16 +3,25 @@ Authentication Routes
 Handles login, registration, and token management
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
+import hashlib
+import logging
+import secrets
+from types import MappingProxyType
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from datetime import timedelta
+from typing import Optional
+from supabase import AuthError
 from app.core.config import settings
+from app.core.logger import RateSampler
 from app.core.security import (
     create_access_token, 
-    get_password_hash, 
-    verify_password,
-    get_current_user
+    get_current_user,
+    revoke_token,
+    security
 )
-from app.core.database import supabase
+from app.core.database import new_supabase_session_client
 from app.models.schemas import (
     LoginRequest, 
     RegisterRequest, 
@@ -23,8 +32,15 @@ from app.models.schemas import (
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Failed logins can arrive in storms - sample them instead of logging every one
+log = logging.getLogger("auth")
+log.addFilter(RateSampler(burst=10, sample_rate=100))
+
+# Auth logs name users by a keyed digest of their email, never the address itself
+_LOG_ID_KEY = hashlib.blake2b(settings.JWT_SECRET_KEY.encode(), person=b"auth-log-id").digest()
+
 # Demo users for hackathon (matches frontend)
-DEMO_USERS = {
+DEMO_USERS = MappingProxyType({
     "reporter@army.mil": {
         "id": "demo-user-1",
         "password": "demo123",
@@ -39,7 +55,50 @@ DEMO_USERS = {
         "email": "admin@rakshanetra.mil",
         "role": "admin"
     }
-}
+})
+
+# /auth/me is derived entirely from the signed token, so it may be cached per token
+ME_CACHE_CONTROL = "private, max-age=30"
+
+# Demo passwords pre-encoded once for constant-time comparison
+_DEMO_PASSWORDS = MappingProxyType({
+    email: user["password"].encode("utf-8") for email, user in DEMO_USERS.items()
+})
+
+
+def _user_ref(email: str) -> str:
+    """Stable pseudonymous id for an email, so log lines can be correlated without PII"""
+    return hashlib.blake2b(email.lower().encode(), digest_size=6, key=_LOG_ID_KEY).hexdigest()
+
+
+def _try_demo_login(email: str, password: str) -> Optional[TokenResponse]:
+    """Issue a token for a demo account, or return None to fall through to Supabase"""
+    demo_user = DEMO_USERS.get(email)
+    if demo_user is None:
+        return None
+    if not secrets.compare_digest(password.encode("utf-8"), _DEMO_PASSWORDS[email]):
+        return None
+    
+    access_token = create_access_token(
+        data={
+            "sub": demo_user["id"],
+            "email": demo_user["email"],
+            "role": demo_user["role"],
+            "name": demo_user["name"]
+        },
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    
+    return TokenResponse.model_construct(
+        access_token=access_token,
+        token_type="bearer",
+        user=UserResponse.model_construct(
+            id=demo_user["id"],
+            name=demo_user["name"],
+            email=demo_user["email"],
+            role=demo_user["role"]
+        )
+    )
 
 
 @router.post("/login", response_model=TokenResponse)
@@ -49,34 +108,15 @@ async def login(credentials: LoginRequest):
     """
     email = credentials.email.lower()
     
-    # Check demo users first (for hackathon demo)
-    if email in DEMO_USERS:
-        demo_user = DEMO_USERS[email]
-        if credentials.password == demo_user["password"]:
-            access_token = create_access_token(
-                data={
-                    "sub": demo_user["id"],
-                    "email": demo_user["email"],
-                    "role": demo_user["role"],
-                    "name": demo_user["name"]
-                },
-                expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            )
-            
-            return TokenResponse(
-                access_token=access_token,
-                token_type="bearer",
-                user=UserResponse(
-                    id=demo_user["id"],
-                    name=demo_user["name"],
-                    email=demo_user["email"],
-                    role=demo_user["role"]
-                )
-            )
+    # Check demo users first (for hackathon demo) - no Supabase round-trip
+    demo_response = _try_demo_login(email, credentials.password)
+    if demo_response is not None:
+        return demo_response
     
-    # Try Supabase auth
+    # Try Supabase auth (on a client of its own - sign-in stores the session on it)
     try:
-        auth_response = supabase.auth.sign_in_with_password({
+        client = new_supabase_session_client()
+        auth_response = await asyncio.to_thread(client.auth.sign_in_with_password, {
             "email": email,
             "password": credentials.password
         })
@@ -84,13 +124,13 @@ async def login(credentials: LoginRequest):
         if auth_response.user:
             user = auth_response.user
             
-            # Get user role from user_roles table
-            role_result = supabase.table("user_roles").select("role").eq("user_id", user.id).single().execute()
-            role = role_result.data.get("role", "reporter") if role_result.data else "reporter"
-            
-            # Get profile
-            profile_result = supabase.table("profiles").select("full_name").eq("user_id", user.id).single().execute()
-            name = profile_result.data.get("full_name", "User") if profile_result.data else "User"
+            # Get role (user_roles) and name (profiles) in a single RPC round-trip
+            profile_result = await asyncio.to_thread(
+                lambda: client.rpc("get_user_auth_profile", {"uid": str(user.id)}).execute()
+            )
+            profile = profile_result.data[0] if profile_result.data else {}
+            role = profile.get("role") or "reporter"
+            name = profile.get("full_name") or "User"
             
             access_token = create_access_token(
                 data={
@@ -101,10 +141,10 @@ async def login(credentials: LoginRequest):
                 }
             )
             
-            return TokenResponse(
+            return TokenResponse.model_construct(
                 access_token=access_token,
                 token_type="bearer",
-                user=UserResponse(
+                user=UserResponse.model_construct(
                     id=str(user.id),
                     name=name,
                     email=user.email,
@@ -112,8 +152,11 @@ async def login(credentials: LoginRequest):
                 )
             )
             
-    except Exception as e:
-        print(f"Auth error: {e}")
+    except AuthError as e:
+        # Expected (bad credentials, unconfirmed email...) - the error code is enough
+        log.warning("login failed for user %s: %s", _user_ref(email), e.code or e.name)
+    except Exception:
+        log.exception("login error for user %s", _user_ref(email))
     
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -128,8 +171,9 @@ async def register(data: RegisterRequest):
     Register a new user
     """
     try:
-        # Create user in Supabase Auth
-        auth_response = supabase.auth.sign_up({
+        # Create user in Supabase Auth (on a client of its own - sign-up stores the session on it)
+        client = new_supabase_session_client()
+        auth_response = await asyncio.to_thread(client.auth.sign_up, {
             "email": data.email,
             "password": data.password,
             "options": {
@@ -142,17 +186,12 @@ async def register(data: RegisterRequest):
         if auth_response.user:
             user = auth_response.user
             
-            # Create profile
-            supabase.table("profiles").insert({
-                "user_id": str(user.id),
-                "full_name": data.name
-            }).execute()
-            
-            # Assign role
-            supabase.table("user_roles").insert({
-                "user_id": str(user.id),
+            # Create profile and assign role in a single transactional RPC
+            await asyncio.to_thread(lambda: client.rpc("create_user_bootstrap", {
+                "uid": str(user.id),
+                "full_name": data.name,
                 "role": data.role.value
-            }).execute()
+            }).execute())
             
             # Generate token
             access_token = create_access_token(
@@ -164,10 +203,10 @@ async def register(data: RegisterRequest):
                 }
             )
             
-            return TokenResponse(
+            return TokenResponse.model_construct(
                 access_token=access_token,
                 token_type="bearer",
-                user=UserResponse(
+                user=UserResponse.model_construct(
                     id=str(user.id),
                     name=data.name,
                     email=data.email,
@@ -176,7 +215,10 @@ async def register(data: RegisterRequest):
             )
             
     except Exception as e:
-        print(f"Registration error: {e}")
+        if isinstance(e, AuthError):
+            log.warning("registration failed for user %s: %s", _user_ref(data.email), e.code or e.name)
+        else:
+            log.exception("registration error for user %s", _user_ref(data.email))
         
         # Check if email already exists
         if "already registered" in str(e).lower():
@@ -192,26 +234,40 @@ async def register(data: RegisterRequest):
 
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout(current_user: dict = Depends(get_current_user)):
+async def logout(
+    current_user: dict = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
     """
     Logout user (client should discard token)
+    
+    Supabase sessions only live on the per-request sign-in clients, so there is
+    no shared Supabase session to sign out - revoking the app token is enough.
     """
-    try:
-        supabase.auth.sign_out()
-    except:
-        pass
+    revoke_token(credentials.credentials)
     
-    return MessageResponse(
+    return MessageResponse.model_construct(
         success=True,
         message="Successfully logged out"
     )
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value against a strong ETag"""
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(current_user: dict = Depends(get_current_user)):
+async def refresh_token(
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
     """
     Refresh access token
     """
+    # Every call mints a new token - never let it be cached
+    response.headers["Cache-Control"] = "no-store"
+    
     access_token = create_access_token(
         data={
             "sub": current_user["id"],
@@ -221,10 +277,10 @@ async def refresh_token(current_user: dict = Depends(get_current_user)):
         }
     )
     
-    return TokenResponse(
+    return TokenResponse.model_construct(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse(
+        user=UserResponse.model_construct(
             id=current_user["id"],
             name=current_user.get("name", "User"),
             email=current_user["email"],
@@ -234,11 +290,29 @@ async def refresh_token(current_user: dict = Depends(get_current_user)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(get_current_user)):
+async def get_current_user_info(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
     """
     Get current user information
+    
+    The response only depends on the bearer token, so its digest is used as
+    the ETag and repeat polls with the same token get 304 Not Modified.
     """
-    return UserResponse(
+    cache_headers = {
+        "ETag": f'"{request.state.token_digest.hex()}"',
+        "Cache-Control": ME_CACHE_CONTROL,
+        "Vary": "Authorization"
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, cache_headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+    
+    response.headers.update(cache_headers)
+    return UserResponse.model_construct(
         id=current_user["id"],
         name=current_user.get("name", "User"),
         email=current_user["email"],
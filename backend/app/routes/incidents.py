@@ -3,22 +3,34 @@ Incident Routes
 Handles incident submission, retrieval, and management
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
-from typing import Optional
+import asyncio
+import hashlib
+import logging
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends, UploadFile, File, Form, Response
+from typing import Optional, List
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
 from app.core.security import get_current_user, get_analyst_or_admin, get_current_user_optional
 from app.models.schemas import (
     IncidentType,
+    AnalysisStatus,
     IncidentCreate,
     IncidentResponse,
     IncidentListResponse,
     IncidentWithAnalysis,
     SubmitIncidentResponse,
+    BulkSubmitIncidentResponse,
     MessageResponse,
     AnalysisResult
 )
+from app.models.internal import to_model
 from app.services.ai_analyzer import analyze_threat
 from app.services.incident_service import (
-    create_incident,
+    create_incident_pending,
+    attach_analysis,
+    mark_analysis_failed,
+    run_analysis_and_attach,
+    create_incidents_bulk,
     get_incidents,
     get_incident_by_id,
     escalate_incident
@@ -26,9 +38,28 @@ from app.services.incident_service import (
 
 router = APIRouter(prefix="/incidents", tags=["Incidents"])
 
+log = logging.getLogger("incidents")
+
+# Uploads are read in 1 MiB chunks so large files are never held in memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Every bulk item may cost a Gemini call - cap the batch and how many run at once
+BULK_SUBMIT_MAX_INCIDENTS = 100
+BULK_ANALYSIS_CONCURRENCY = 8
+
+
+def _file_too_large() -> HTTPException:
+    """413 for uploads over the configured MAX_FILE_SIZE_MB"""
+    return HTTPException(
+        status_code=413,  # Content Too Large
+        detail=f"File exceeds the {settings.MAX_FILE_SIZE_MB} MB upload limit"
+    )
+
 
 @router.post("", response_model=SubmitIncidentResponse)
 async def submit_incident(
+    background_tasks: BackgroundTasks,
+    response: Response,
     type: IncidentType = Form(...),
     content: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
@@ -44,6 +75,9 @@ async def submit_incident(
     - **description**: Additional context
     - **location**: Unit/location of reporter
     - **file**: Suspicious file upload (for file type)
+    
+    File incidents are analyzed in the background: the response is 202 Accepted
+    and the result is polled from /incidents/{id}/analysis.
     """
     
     # Validate content based on type
@@ -59,52 +93,158 @@ async def submit_incident(
             detail="File is required for file incidents"
         )
     
+    # Reject oversized uploads before reading them when the size is already known
+    max_file_size = settings.max_file_size_bytes
+    if file and file.size is not None and file.size > max_file_size:
+        raise _file_too_large()
+    
     # Handle file upload
     file_url = None
     file_info = None
     analysis_content = content or ""
     
     if file:
-        # Read file content for analysis
-        file_content = await file.read()
+        # Stream the upload to measure and fingerprint it without buffering the whole file
+        size = 0
+        hasher = hashlib.sha256()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_file_size:
+                raise _file_too_large()
+            hasher.update(chunk)
+        
         file_info = {
             "filename": file.filename,
             "content_type": file.content_type,
-            "size": len(file_content)
+            "size": size,
+            "sha256": hasher.hexdigest()
         }
-        analysis_content = f"File: {file.filename} (Type: {file.content_type}, Size: {len(file_content)} bytes)"
+        analysis_content = f"File: {file.filename} (Type: {file.content_type}, Size: {size} bytes, SHA-256: {file_info['sha256']})"
         
         # TODO: Upload to storage and get URL
         file_url = f"uploads/{file.filename}"
     
-    # Perform AI analysis
-    analysis = await analyze_threat(
+    # File analysis can be slow - persist now, analyze after the response is sent
+    if type == IncidentType.FILE:
+        pending = await create_incident_pending(
+            incident_type=type,
+            content=content,
+            description=description,
+            location=location,
+            file_url=file_url,
+            user_id=current_user.get("id")
+        )
+        background_tasks.add_task(
+            run_analysis_and_attach, pending, type, analysis_content, description, file_info
+        )
+        
+        response.status_code = status.HTTP_202_ACCEPTED
+        return SubmitIncidentResponse.model_construct(
+            success=True,
+            incident_id=pending["incident_id"],
+            id=pending["db_id"],
+            message="Incident submitted - analysis queued",
+            analysis_status=AnalysisStatus.PENDING,
+            analysis=None
+        )
+    
+    # Insert the incident while the AI analysis runs, then attach the results
+    analysis_task = asyncio.ensure_future(analyze_threat(
         incident_type=type,
         content=analysis_content,
         description=description,
         file_info=file_info
-    )
+    ))
+    try:
+        pending = await create_incident_pending(
+            incident_type=type,
+            content=content,
+            description=description,
+            location=location,
+            file_url=file_url,
+            user_id=current_user.get("id")
+        )
+    except BaseException:
+        analysis_task.cancel()
+        raise
     
-    # Store incident
-    result = await create_incident(
-        incident_type=type,
-        content=content,
-        description=description,
-        location=location,
-        file_url=file_url,
-        user_id=current_user.get("id"),
-        analysis=analysis
-    )
+    try:
+        analysis = await analysis_task
+        result = await attach_analysis(pending, analysis)
+    except Exception as e:
+        # The incident is stored - flag it instead of leaving it pending forever
+        log.error("analysis failed for %s: %s", pending["db_id"], e, exc_info=True)
+        await mark_analysis_failed(pending)
+        return SubmitIncidentResponse.model_construct(
+            success=True,
+            incident_id=pending["incident_id"],
+            id=pending["db_id"],
+            message="Incident submitted - analysis failed",
+            analysis_status=AnalysisStatus.FAILED,
+            analysis=None
+        )
     
-    return SubmitIncidentResponse(
+    return SubmitIncidentResponse.model_construct(
         success=True,
         incident_id=result["incident_id"],
+        id=result["db_id"],
         message="Incident submitted and analyzed successfully",
         analysis=analysis
     )
 
 
-@router.get("", response_model=IncidentListResponse)
+@router.post("/bulk", response_model=BulkSubmitIncidentResponse)
+async def submit_incidents_bulk(
+    incidents: List[IncidentCreate],
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Submit a batch of incidents for AI analysis (e.g. unit-level reporting)
+    
+    All incidents are stored in a single database transaction. At most
+    BULK_SUBMIT_MAX_INCIDENTS are accepted per call.
+    """
+    
+    if not incidents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one incident is required"
+        )
+    
+    if len(incidents) > BULK_SUBMIT_MAX_INCIDENTS:
+        raise HTTPException(
+            status_code=413,  # Content Too Large
+            detail=f"At most {BULK_SUBMIT_MAX_INCIDENTS} incidents can be submitted at once"
+        )
+    
+    semaphore = asyncio.Semaphore(BULK_ANALYSIS_CONCURRENCY)
+    
+    async def analyze(incident: IncidentCreate) -> AnalysisResult:
+        async with semaphore:
+            return await analyze_threat(
+                incident_type=incident.type,
+                content=incident.content or "",
+                description=incident.description
+            )
+    
+    analyses = await asyncio.gather(*(analyze(incident) for incident in incidents))
+    
+    results = await create_incidents_bulk(
+        incidents=incidents,
+        analyses=analyses,
+        user_id=current_user.get("id")
+    )
+    
+    return BulkSubmitIncidentResponse.model_construct(
+        success=True,
+        total_submitted=len(results),
+        incident_ids=[result["incident_id"] for result in results],
+        ids=[result["db_id"] for result in results],
+        message=f"{len(results)} incidents submitted and analyzed successfully"
+    )
+
+
+@router.get("", response_model=IncidentListResponse, response_class=ORJSONResponse)
 async def list_incidents(
     page: int = 1,
     per_page: int = 20,
@@ -134,7 +274,12 @@ async def list_incidents(
         is_analyst=is_analyst
     )
     
-    return IncidentListResponse(**result)
+    return IncidentListResponse.model_construct(
+        incidents=[to_model(IncidentResponse, record) for record in result["incidents"]],
+        total=result["total"],
+        page=result["page"],
+        per_page=result["per_page"]
+    )
 
 
 @router.get("/{incident_id}", response_model=IncidentWithAnalysis)
@@ -154,9 +299,9 @@ async def get_incident(
             detail="Incident not found"
         )
     
-    return IncidentWithAnalysis(
-        incident=IncidentResponse(**result["incident"]),
-        analysis=AnalysisResult(**result["analysis"]) if result["analysis"] else None
+    return IncidentWithAnalysis.model_construct(
+        incident=to_model(IncidentResponse, result["incident"]),
+        analysis=to_model(AnalysisResult, result["analysis"]) if result["analysis"] else None
     )
 
 
@@ -177,13 +322,26 @@ async def get_incident_analysis(
             detail="Incident not found"
         )
     
+    analysis_status = result["incident"].analysis_status
+    if analysis_status == AnalysisStatus.PENDING:
+        return ORJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"status": analysis_status.value, "detail": "Analysis in progress"}
+        )
+    
+    if analysis_status == AnalysisStatus.FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Analysis failed for this incident"
+        )
+    
     if not result["analysis"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found for this incident"
         )
     
-    return AnalysisResult(**result["analysis"])
+    return to_model(AnalysisResult, result["analysis"])
 
 
 @router.post("/{incident_id}/escalate", response_model=MessageResponse)
@@ -203,7 +361,7 @@ async def escalate_to_cert(
             detail="Failed to escalate incident"
         )
     
-    return MessageResponse(
+    return MessageResponse.model_construct(
         success=True,
         message="Incident escalated to CERT-Army successfully"
     )
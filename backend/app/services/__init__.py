@@ -3,6 +3,9 @@
 from app.services.ai_analyzer import analyze_threat, threat_analyzer
 from app.services.incident_service import (
     create_incident,
+    create_incident_pending,
+    attach_analysis,
+    create_incidents_bulk,
     get_incidents,
     get_incident_by_id,
     escalate_incident,
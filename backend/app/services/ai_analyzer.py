@@ -6,31 +6,350 @@ Uses Google Gemini or OpenAI for intelligent threat assessment
 import re
 import json
 import socket
+import time
+import asyncio
+import hashlib
 import httpx
+from collections import OrderedDict
 from urllib.parse import urlparse
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from app.core.config import settings
 from app.models.schemas import AnalysisResult, SeverityLevel, IncidentType
+from modules.keyword_automaton import trie_branches
+
+# ============== AI PROVIDER HTTP ==============
+
+GEMINI_MODEL = "gemini-pro"
+GEMINI_GENERATE_URL = (
+    f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+)
+
+# One keep-alive connection pool for every AI provider call - HTTP/2 multiplexes
+# concurrent analyses instead of paying a TCP/TLS handshake per request
+ai_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=httpx.Timeout(10.0, connect=3.0)
+)
+
+
+async def close_ai_http_client():
+    """Close the AI provider connection pool (called on shutdown)"""
+    await ai_http_client.aclose()
+
+
+# Trusted/safe domains (and their subdomains) - these get very low risk scores
+TRUSTED_DOMAINS = frozenset({
+    'youtube.com', 'youtu.be', 'google.com', 'google.co.in',
+    'facebook.com', 'fb.com', 'instagram.com', 'twitter.com', 'x.com',
+    'linkedin.com', 'whatsapp.com', 'telegram.org',
+    'microsoft.com', 'apple.com', 'amazon.com', 'amazon.in',
+    'flipkart.com', 'myntra.com', 'paytm.com',
+    'github.com', 'stackoverflow.com', 'reddit.com',
+    'wikipedia.org', 'wikimedia.org',
+    'gov.in', 'nic.in', 'army.mil', 'indianarmy.nic.in',
+    'sbi.co.in', 'hdfcbank.com', 'icicibank.com',
+    'irctc.co.in', 'indianrailways.gov.in',
+    'gmail.com', 'outlook.com', 'yahoo.com',
+    'netflix.com', 'hotstar.com', 'primevideo.com',
+    'zoom.us', 'meet.google.com', 'teams.microsoft.com',
+})
+
+# URL scoring rules: name -> (score, indicator); indicators are reported in this order
+URL_RULES = {
+    # Generic suspicious patterns (score only)
+    "keyword": (15, None),
+    "free_tld": (15, None),
+    "shortener": (15, None),
+    "ip": (15, None),
+    "password": (15, None),
+    "impersonation": (15, None),
+    # Red flags
+    "login_flag": (10, "Contains login/verification keywords"),
+    "gov_flag": (25, "Mimics official government/military domain"),
+    "ip_flag": (20, "Uses IP address instead of domain name"),
+    "tld_flag": (15, "Uses free/suspicious domain TLD common in phishing"),
+}
+
+# Keyword -> markers it sets. Markers named in URL_RULES score directly, the
+# others only feed URL_SEQUENCES / the official-domain check.
+URL_KEYWORDS = {
+    "login": ("keyword", "login_flag"),
+    "signin": ("keyword", "login_flag"),
+    "verify": ("keyword", "login_flag"),
+    "secure": ("keyword", "login_flag"),
+    "account": ("keyword",),
+    "update": ("keyword",),
+    "confirm": ("keyword",),
+    "bit.ly": ("shortener",),
+    "tinyurl": ("shortener",),
+    "goo.gl": ("shortener",),
+    "t.co": ("shortener",),
+    "password": ("password",),
+    "passwd": ("password",),
+    "pwd": ("password",),
+    "credential": ("password",),
+    ".tk": ("tld_flag",),
+    ".ml": ("tld_flag",),
+    ".ga": ("tld_flag",),
+    ".cf": ("tld_flag",),
+    ".xyz": ("tld_flag",),
+    "army": ("gov_word", "gov_flag"),
+    "defence": ("gov_word", "gov_flag"),
+    "military": ("gov_word", "gov_flag"),
+    "gov": ("gov_word", "gov_flag"),
+    "defense": ("gov_word",),
+    "sena": ("gov_flag",),
+    ".com": ("commercial_tld",),
+    ".net": ("commercial_tld",),
+    ".org": ("commercial_tld",),
+    ".gov.in": ("official",),
+    ".nic.in": ("official",),
+    ".mil": ("official",),
+}
+URL_PATTERNS = (
+    (r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', ("ip", "ip_flag")),
+)
+# (lead, follow, rule): rule fires when lead appears before follow on one line
+URL_SEQUENCES = (
+    ("gov_word", "commercial_tld", "impersonation"),
+)
+FREE_TLD_SUFFIXES = ('.tk', '.ml', '.ga', '.cf', '.gq')
+
+# Message scoring rules: name -> (score, indicator)
+MESSAGE_RULES = {
+    "urgency": (12, None),
+    "otp": (12, None),
+    "click": (12, None),
+    "alert": (12, None),
+    "reward": (12, None),
+    "payment": (12, None),
+    "urgent_flag": (15, "Contains urgent action request"),
+    "credential_flag": (20, "Requests sensitive credentials"),
+    "authority_flag": (20, "Impersonates authority figure"),
+    "prize_flag": (15, "Contains prize/lottery claim"),
+    "link_flag": (10, "Contains external link"),
+}
+
+MESSAGE_KEYWORDS = {
+    "urgent": ("urgency", "urgent_flag"),
+    "immediately": ("urgency", "urgent_flag"),
+    "act now": ("urgency", "urgent_flag"),
+    "limited time": ("urgency",),
+    "within 24 hours": ("urgent_flag",),
+    "otp": ("otp", "credential_flag"),
+    "verification": ("otp",),
+    "code": ("otp",),
+    "click here": ("click",),
+    "click below": ("click",),
+    "follow this link": ("click",),
+    "account number": ("account_mention", "credential_flag"),
+    "account": ("account_mention",),
+    "suspended": ("suspended_mention",),
+    "security": ("security_mention",),
+    "alert": ("alert_mention",),
+    "unauthorized": ("unauthorized_mention",),
+    "access": ("access_mention",),
+    "winner": ("reward", "prize_flag"),
+    "lottery": ("reward", "prize_flag"),
+    "prize": ("reward", "prize_flag"),
+    "congratulations": ("reward",),
+    "lakhs": ("prize_flag",),
+    "crores": ("prize_flag",),
+    "bank manager": ("money_mention", "authority_flag"),
+    "bank": ("money_mention",),
+    "transfer": ("money_mention",),
+    "payment": ("money_mention",),
+    "failed": ("problem_mention",),
+    "pending": ("problem_mention",),
+    "verify": ("problem_mention",),
+    "army hq": ("authority_flag",),
+    "defence ministry": ("authority_flag",),
+    "collector": ("authority_flag",),
+    "password": ("credential_flag",),
+    "pin": ("credential_flag",),
+    "cvv": ("credential_flag",),
+    "http": ("link_flag",),
+    "www.": ("link_flag",),
+}
+MESSAGE_PATTERNS = (
+    (r'one.?time', ("otp",)),
+)
+MESSAGE_SEQUENCES = (
+    ("account_mention", "suspended_mention", "alert"),
+    ("security_mention", "alert_mention", "alert"),
+    ("unauthorized_mention", "access_mention", "alert"),
+    ("money_mention", "problem_mention", "payment"),
+)
+
+
+# urlparse keeps spaces in the host and silently drops newlines/tabs, so
+# "https://sbi-login.tk x.gov.in" would otherwise resolve to a .gov.in host.
+# Trust also needs a well-formed host (no empty labels like "..gov.in") and no
+# userinfo ("google.com@x.gov.in"), a common obfuscation trick.
+_UNTRUSTED_URL_CHAR_RE = re.compile(r'[\s\x00-\x1f\x7f@]')
+_PLAIN_HOST_RE = re.compile(r'(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?')
+
+
+def _trusted_domain(url: str) -> Optional[str]:
+    """
+    Return the trusted domain the URL's host belongs to, if any
+    
+    Matches the host itself or a parent domain, so `evil-google.com` or
+    `google.com.attacker.tk` are not mistaken for google.com. Input with
+    whitespace, control characters, userinfo, a non-http(s) scheme or a
+    malformed host is never trusted.
+    """
+    if _UNTRUSTED_URL_CHAR_RE.search(url):
+        return None
+    if '://' not in url:
+        url = 'http://' + url
+    elif not url.startswith(('http://', 'https://')):
+        return None
+    try:
+        host = urlparse(url).hostname or ''
+    except ValueError:
+        return None
+    if not _PLAIN_HOST_RE.fullmatch(host):
+        return None
+    labels = host.split('.')
+    for i in range(len(labels) - 1):
+        domain = '.'.join(labels[i:])
+        if domain in TRUSTED_DOMAINS:
+            return domain
+    return None
+
+
+class _KeywordScanner:
+    """
+    Finds every keyword and pattern in a single pass over the text
+    
+    The search restarts one character after each hit, so overlapping matches are
+    all seen. A sequence fires when its lead marker appears before its follow
+    marker on the same line (the equivalent of `lead.*follow`).
+    """
+    
+    def __init__(self, keywords: Dict[str, tuple], patterns: tuple = (), sequences: tuple = ()):
+        self.keywords = keywords
+        self.patterns = [(re.compile(pattern), markers) for pattern, markers in patterns]
+        self.sequences = sequences
+        # Trie branches stay top-level so re keeps its first-character prefilter
+        alternatives = trie_branches(keywords)
+        alternatives += [pattern for pattern, _ in patterns]
+        alternatives.append(r'\n')
+        self.regex = re.compile("|".join(alternatives))
+    
+    def _markers(self, token: str) -> tuple:
+        markers = self.keywords.get(token)
+        if markers is None:
+            markers = next(m for regex, m in self.patterns if regex.fullmatch(token))
+        return markers
+    
+    def scan(self, text: str) -> set:
+        """Return every marker (and sequence rule) found in text"""
+        hits = set()
+        leads: Dict[str, int] = {}  # lead marker -> earliest end offset on this line
+        match = self.regex.search(text)
+        while match:
+            token = match.group()
+            if token == "\n":
+                leads.clear()
+            else:
+                markers = self._markers(token)
+                hits.update(markers)
+                for lead, follow, rule in self.sequences:
+                    if lead in markers:
+                        leads[lead] = min(leads.get(lead, match.end()), match.end())
+                    if follow in markers and leads.get(lead, match.start() + 1) <= match.start():
+                        hits.add(rule)
+            match = self.regex.search(text, match.start() + 1)
+        return hits
+
+
+def _score_rules(rules: Dict[str, tuple], hits: set, risk_score: int, indicators: List[str]) -> int:
+    """Add the score of every rule hit and collect its indicator"""
+    for name, (score, indicator) in rules.items():
+        if name in hits:
+            risk_score += score
+            if indicator:
+                indicators.append(indicator)
+    return risk_score
+
+
+# Built once at import - the analyzers run these on every incident
+_URL_SCANNER = _KeywordScanner(URL_KEYWORDS, URL_PATTERNS, URL_SEQUENCES)
+_MESSAGE_SCANNER = _KeywordScanner(MESSAGE_KEYWORDS, MESSAGE_PATTERNS, MESSAGE_SEQUENCES)
+
+# URL shape validation (applied to lowercased input, so no IGNORECASE).
+# Every host character is also a valid path character, so the lookahead can
+# reject any URL containing a disallowed character in one linear pass before
+# the host/TLD split is attempted - otherwise e.g. "https://a.aa.aa...aa "
+# makes the engine retry the trailing match from every dot.
+_URL_RE = re.compile(
+    r'^(https?://|www\.)'
+    r'(?=[-a-zA-Z0-9@:%_\+.~#?&/=]*$)'
+    r'[a-zA-Z0-9][-a-zA-Z0-9@:%._\+~#=]{0,255}\.[a-z]{2,10}\b([-a-zA-Z0-9@:%_\+.~#?&//=]*)$'
+)
+_IP_URL_RE = re.compile(r'^https?://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}')
+_SIMPLE_DOMAIN_RE = re.compile(r'^[a-zA-Z0-9][-a-zA-Z0-9]*\.[a-z]{2,10}(/.*)?$')
+
+# First {...} block in an LLM reply
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+
+# Risk score thresholds -> (severity, word used in summaries), highest first
+SEVERITY_BUCKETS = (
+    (80, SeverityLevel.CRITICAL, "critical"),
+    (60, SeverityLevel.HIGH, "high"),
+    (40, SeverityLevel.MEDIUM, "moderate"),
+    (0, SeverityLevel.LOW, "low"),
+)
+
+SUMMARY_TEMPLATES = {
+    IncidentType.URL: "This URL has been analyzed by Sentinel AI. The link exhibits {severity_word} risk characteristics commonly associated with {threat_type} attempts targeting defence personnel. Exercise caution before interacting with this resource.",
+    IncidentType.MESSAGE: "This message has been analyzed by Sentinel AI. The content shows {severity_word} risk indicators suggesting potential {threat_type} activity. The communication patterns indicate possible social engineering targeting defence personnel or their families.",
+    IncidentType.FILE: "This file has been flagged for {severity_word} risk. The file type and characteristics suggest potential {threat_type} delivery mechanism. Manual inspection by CERT analysts is recommended before opening.",
+}
+DEFAULT_SUMMARY = "Content analyzed. Review recommendations below."
+
+# Recommendations: escalation first (critical/high), then base, then per threat type
+ESCALATE_RECOMMENDATION = "IMMEDIATE ACTION REQUIRED - Escalate to CERT-Army"
+BASE_RECOMMENDATIONS = (
+    "Report this incident to your unit IT security officer",
+    "Do not interact with the suspicious content",
+)
+THREAT_RECOMMENDATIONS = {
+    "phishing": (
+        "Block the URL at firewall level",
+        "Check if any credentials were entered on this site",
+        "Change passwords for any accounts that may have been compromised",
+        "Scan affected devices for malware",
+    ),
+    "malware": (
+        "Do not open or execute the file",
+        "Quarantine the file for analysis",
+        "Run full antivirus scan on the system",
+        "Check for unusual system activity",
+    ),
+    "scam": (
+        "Do not respond to the message",
+        "Block the sender",
+        "Do not share any personal or financial information",
+        "Warn colleagues about similar scam attempts",
+    ),
+    "spam": (
+        "Mark as spam and delete",
+        "Add sender to block list",
+    ),
+}
+
+
+def _severity_bucket(risk_score: int) -> tuple:
+    """Map a risk score to (SeverityLevel, summary word)"""
+    for threshold, severity, word in SEVERITY_BUCKETS:
+        if risk_score >= threshold:
+            return severity, word
+    return SeverityLevel.LOW, "low"
 
-# URL analysis patterns
-SUSPICIOUS_URL_PATTERNS = [
-    r'(?:login|signin|verify|secure|account|update|confirm)',
-    r'(?:\.tk|\.ml|\.ga|\.cf|\.gq)$',  # Free domain TLDs often used in phishing
-    r'(?:bit\.ly|tinyurl|goo\.gl|t\.co)',  # URL shorteners
-    r'(?:\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})',  # IP addresses in URLs
-    r'(?:password|passwd|pwd|credential)',
-    r'(?:army|defence|defense|military|gov).*(?:\.com|\.net|\.org)',  # Impersonation attempts
-]
-
-# Suspicious message patterns
-SUSPICIOUS_MESSAGE_PATTERNS = [
-    r'(?:urgent|immediately|act now|limited time)',
-    r'(?:otp|one.?time|verification|code)',
-    r'(?:click here|click below|follow this link)',
-    r'(?:account.*suspended|security.*alert|unauthorized.*access)',
-    r'(?:winner|lottery|prize|congratulations)',
-    r'(?:bank|transfer|payment).*(?:failed|pending|verify)',
-]
 
 # Known threat indicators
 THREAT_INDICATORS = {
@@ -67,14 +386,6 @@ class ThreatAnalyzer:
     def __init__(self):
         self.gemini_available = bool(settings.GOOGLE_API_KEY)
         self.openai_available = bool(settings.OPENAI_API_KEY)
-        
-        if self.gemini_available:
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=settings.GOOGLE_API_KEY)
-                self.gemini_model = genai.GenerativeModel('gemini-pro')
-            except Exception:
-                self.gemini_available = False
     
     async def analyze_incident(
         self, 
@@ -86,16 +397,27 @@ class ThreatAnalyzer:
         """
         Analyze an incident and return threat assessment
         """
+        result, _ = await self._analyze_incident(incident_type, content, description)
+        return result
+    
+    async def _analyze_incident(
+        self,
+        incident_type: IncidentType,
+        content: str,
+        description: Optional[str] = None
+    ) -> Tuple[AnalysisResult, bool]:
+        """Analyze an incident; the flag is True when Gemini failed and the rules stood in"""
         
         # Try AI analysis first
         if self.gemini_available:
             try:
-                return await self._analyze_with_gemini(incident_type, content, description)
+                return await self._analyze_with_gemini(incident_type, content, description), False
             except Exception as e:
                 print(f"Gemini analysis failed: {e}")
+                return self._rule_based_analysis(incident_type, content, description), True
         
-        # Fallback to rule-based analysis
-        return self._rule_based_analysis(incident_type, content, description)
+        # Rule-based analysis when no AI provider is configured
+        return self._rule_based_analysis(incident_type, content, description), False
     
     async def _analyze_with_gemini(
         self,
@@ -103,7 +425,7 @@ class ThreatAnalyzer:
         content: str,
         description: Optional[str] = None
     ) -> AnalysisResult:
-        """Use Google Gemini for AI-powered analysis"""
+        """Use Google Gemini for AI-powered analysis (raises when Gemini fails)"""
         
         prompt = f"""You are a cyber security analyst for the Indian Defence Forces. 
 Analyze the following {incident_type.value} for potential security threats.
@@ -131,28 +453,28 @@ Consider:
 
 Be thorough but concise. Focus on defence-relevant threats."""
 
-        try:
-            response = self.gemini_model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{[\s\S]*\}', result_text)
-            if json_match:
-                result_data = json.loads(json_match.group())
-                
-                return AnalysisResult(
-                    risk_score=min(100, max(0, int(result_data.get("risk_score", 50)))),
-                    severity=SeverityLevel(result_data.get("severity", "medium").lower()),
-                    summary=result_data.get("summary", "Analysis complete."),
-                    indicators=result_data.get("indicators", [])[:10],
-                    recommendations=result_data.get("recommendations", [])[:10],
-                    iocs=[]
-                )
-        except Exception as e:
-            print(f"Gemini parsing error: {e}")
+        response = await ai_http_client.post(
+            GEMINI_GENERATE_URL,
+            headers={"x-goog-api-key": settings.GOOGLE_API_KEY},
+            json={"contents": [{"parts": [{"text": prompt}]}]}
+        )
+        response.raise_for_status()
+        result_text = response.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
         
-        # Fallback
-        return self._rule_based_analysis(incident_type, content, description)
+        # Extract JSON from response
+        json_match = _JSON_OBJECT_RE.search(result_text)
+        if not json_match:
+            raise ValueError("Gemini response contained no JSON object")
+        result_data = json.loads(json_match.group())
+        
+        return AnalysisResult(
+            risk_score=min(100, max(0, int(result_data.get("risk_score", 50)))),
+            severity=SeverityLevel(result_data.get("severity", "medium").lower()),
+            summary=result_data.get("summary", "Analysis complete."),
+            indicators=result_data.get("indicators", [])[:10],
+            recommendations=result_data.get("recommendations", [])[:10],
+            iocs=[]
+        )
     
     def _rule_based_analysis(
         self,
@@ -162,19 +484,15 @@ Be thorough but concise. Focus on defence-relevant threats."""
     ) -> AnalysisResult:
         """Rule-based fallback analysis"""
         
-        content_lower = content.lower() if content else ""
-        description_lower = description.lower() if description else ""
-        combined = f"{content_lower} {description_lower}"
-        
         risk_score = 0
         indicators = []
         threat_type = "unknown"
         
         if incident_type == IncidentType.URL:
-            risk_score, indicators = self._analyze_url(content)
+            risk_score, indicators = self._analyze_url(content, content.lower())
             threat_type = "phishing"
         elif incident_type == IncidentType.MESSAGE:
-            risk_score, indicators = self._analyze_message(content)
+            risk_score, indicators = self._analyze_message(content.lower())
             threat_type = "scam" if risk_score > 50 else "spam"
         else:
             risk_score = 60  # Files get baseline high risk
@@ -182,17 +500,10 @@ Be thorough but concise. Focus on defence-relevant threats."""
             threat_type = "malware"
         
         # Determine severity
-        if risk_score >= 80:
-            severity = SeverityLevel.CRITICAL
-        elif risk_score >= 60:
-            severity = SeverityLevel.HIGH
-        elif risk_score >= 40:
-            severity = SeverityLevel.MEDIUM
-        else:
-            severity = SeverityLevel.LOW
+        severity, severity_word = _severity_bucket(risk_score)
         
         # Generate summary
-        summary = self._generate_summary(incident_type, threat_type, risk_score)
+        summary = self._generate_summary(incident_type, threat_type, severity_word)
         
         # Get recommendations
         recommendations = self._get_recommendations(threat_type, severity)
@@ -206,72 +517,36 @@ Be thorough but concise. Focus on defence-relevant threats."""
             iocs=[]
         )
     
-    def _analyze_url(self, url: str) -> tuple[int, List[str]]:
-        """Analyze URL for threats"""
+    def _analyze_url(self, url: str, url_lower: str) -> tuple[int, List[str]]:
+        """Analyze URL for threats (url_lower is the caller's lowercased url)"""
         indicators = []
-        url_lower = url.lower().strip()
-        
-        # List of trusted/safe domains - these get very low risk scores
-        TRUSTED_DOMAINS = [
-            'youtube.com', 'youtu.be', 'google.com', 'google.co.in',
-            'facebook.com', 'fb.com', 'instagram.com', 'twitter.com', 'x.com',
-            'linkedin.com', 'whatsapp.com', 'telegram.org',
-            'microsoft.com', 'apple.com', 'amazon.com', 'amazon.in',
-            'flipkart.com', 'myntra.com', 'paytm.com',
-            'github.com', 'stackoverflow.com', 'reddit.com',
-            'wikipedia.org', 'wikimedia.org',
-            'gov.in', 'nic.in', 'army.mil', 'indianarmy.nic.in',
-            'sbi.co.in', 'hdfcbank.com', 'icicibank.com',
-            'irctc.co.in', 'indianrailways.gov.in',
-            'gmail.com', 'outlook.com', 'yahoo.com',
-            'netflix.com', 'hotstar.com', 'primevideo.com',
-            'zoom.us', 'meet.google.com', 'teams.microsoft.com',
-        ]
+        url_lower = url_lower.strip()
         
-        # First, validate if this is actually a URL
-        url_pattern = r'^(https?://|www\.)[a-zA-Z0-9][-a-zA-Z0-9@:%._\+~#=]{0,255}\.[a-z]{2,10}\b([-a-zA-Z0-9@:%_\+.~#?&//=]*)$'
-        ip_url_pattern = r'^https?://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'
+        # Check if URL is from a trusted domain FIRST - a set lookup on the host,
+        # so the common legitimate links skip the validation regexes entirely
+        trusted = _trusted_domain(url_lower)
+        if trusted:
+            return 5, [f"This is a well-known trusted website ({trusted})", "No threat detected - safe to access"]
         
-        is_valid_url = bool(re.match(url_pattern, url_lower, re.IGNORECASE)) or bool(re.match(ip_url_pattern, url_lower))
+        # Then validate if this is actually a URL
+        is_valid_url = bool(_URL_RE.match(url_lower)) or bool(_IP_URL_RE.match(url_lower))
         
         # Also check for simple domain patterns without protocol
-        simple_domain = r'^[a-zA-Z0-9][-a-zA-Z0-9]*\.[a-z]{2,10}(/.*)?$'
         if not is_valid_url:
-            is_valid_url = bool(re.match(simple_domain, url_lower))
+            is_valid_url = bool(_SIMPLE_DOMAIN_RE.match(url_lower))
         
         if not is_valid_url:
             # Not a valid URL - return very low risk
             return 5, ["This does not appear to be a valid URL", "Please enter a complete URL starting with http:// or https://"]
         
-        # Check if URL is from a trusted domain FIRST
-        for trusted in TRUSTED_DOMAINS:
-            if trusted in url_lower:
-                return 5, [f"This is a well-known trusted website ({trusted})", "No threat detected - safe to access"]
-        
         # Valid URL but not trusted - now analyze for threats
-        risk_score = 20
-        
-        for pattern in SUSPICIOUS_URL_PATTERNS:
-            if re.search(pattern, url_lower):
-                risk_score += 15
-                
-        # Check for common red flags
-        if any(x in url_lower for x in ['login', 'signin', 'verify', 'secure']):
-            indicators.append("Contains login/verification keywords")
-            risk_score += 10
-            
-        if any(x in url_lower for x in ['army', 'defence', 'military', 'gov', 'sena']):
-            if not any(trusted in url_lower for trusted in ['.gov.in', '.nic.in', '.mil']):
-                indicators.append("Mimics official government/military domain")
-                risk_score += 25
-                
-        if re.search(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', url_lower):
-            indicators.append("Uses IP address instead of domain name")
-            risk_score += 20
-            
-        if any(x in url_lower for x in ['.tk', '.ml', '.ga', '.cf', '.xyz']):
-            indicators.append("Uses free/suspicious domain TLD common in phishing")
-            risk_score += 15
+        hits = _URL_SCANNER.scan(url_lower)
+        if url_lower.endswith(FREE_TLD_SUFFIXES):
+            hits.add("free_tld")
+        # Government wording isn't impersonation on an official domain
+        if "official" in hits:
+            hits.discard("gov_flag")
+        risk_score = _score_rules(URL_RULES, hits, 20, indicators)
             
         if len(url) > 100:
             indicators.append("Unusually long URL - possible obfuscation")
@@ -291,114 +566,96 @@ Be thorough but concise. Focus on defence-relevant threats."""
             
         return min(100, risk_score), indicators
     
-    def _analyze_message(self, message: str) -> tuple[int, List[str]]:
-        """Analyze message content for threats"""
+    def _analyze_message(self, msg_lower: str) -> tuple[int, List[str]]:
+        """Analyze (already lowercased) message content for threats"""
         risk_score = 15
         indicators = []
-        msg_lower = message.lower()
         
-        for pattern in SUSPICIOUS_MESSAGE_PATTERNS:
-            if re.search(pattern, msg_lower):
-                risk_score += 12
-                
-        # Check for urgency indicators
-        if any(x in msg_lower for x in ['urgent', 'immediately', 'within 24 hours', 'act now']):
-            indicators.append("Contains urgent action request")
-            risk_score += 15
-            
-        # Check for credential requests
-        if any(x in msg_lower for x in ['otp', 'password', 'pin', 'cvv', 'account number']):
-            indicators.append("Requests sensitive credentials")
-            risk_score += 20
-            
-        # Check for impersonation
-        if any(x in msg_lower for x in ['army hq', 'defence ministry', 'bank manager', 'collector']):
-            indicators.append("Impersonates authority figure")
-            risk_score += 20
-            
-        # Check for reward/prize scams
-        if any(x in msg_lower for x in ['winner', 'lottery', 'prize', 'lakhs', 'crores']):
-            indicators.append("Contains prize/lottery claim")
-            risk_score += 15
-            
-        # Check for links
-        if 'http' in msg_lower or 'www.' in msg_lower:
-            indicators.append("Contains external link")
-            risk_score += 10
+        risk_score = _score_rules(MESSAGE_RULES, _MESSAGE_SCANNER.scan(msg_lower), risk_score, indicators)
             
         if not indicators:
             indicators.append("Message appears relatively safe")
             
         return min(100, risk_score), indicators
     
-    def _generate_summary(self, incident_type: IncidentType, threat_type: str, risk_score: int) -> str:
+    def _generate_summary(self, incident_type: IncidentType, threat_type: str, severity_word: str) -> str:
         """Generate threat summary"""
-        
-        severity_word = "critical" if risk_score >= 80 else "high" if risk_score >= 60 else "moderate" if risk_score >= 40 else "low"
-        
-        summaries = {
-            IncidentType.URL: f"This URL has been analyzed by Sentinel AI. The link exhibits {severity_word} risk characteristics commonly associated with {threat_type} attempts targeting defence personnel. Exercise caution before interacting with this resource.",
-            IncidentType.MESSAGE: f"This message has been analyzed by Sentinel AI. The content shows {severity_word} risk indicators suggesting potential {threat_type} activity. The communication patterns indicate possible social engineering targeting defence personnel or their families.",
-            IncidentType.FILE: f"This file has been flagged for {severity_word} risk. The file type and characteristics suggest potential {threat_type} delivery mechanism. Manual inspection by CERT analysts is recommended before opening.",
-        }
-        
-        return summaries.get(incident_type, "Content analyzed. Review recommendations below.")
+        template = SUMMARY_TEMPLATES.get(incident_type)
+        if template is None:
+            return DEFAULT_SUMMARY
+        return template.format(severity_word=severity_word, threat_type=threat_type)
     
     def _get_recommendations(self, threat_type: str, severity: SeverityLevel) -> List[str]:
         """Get actionable recommendations based on threat type"""
         
-        base_recommendations = [
-            "Report this incident to your unit IT security officer",
-            "Do not interact with the suspicious content",
-        ]
-        
-        threat_recommendations = {
-            "phishing": [
-                "Block the URL at firewall level",
-                "Check if any credentials were entered on this site",
-                "Change passwords for any accounts that may have been compromised",
-                "Scan affected devices for malware",
-            ],
-            "malware": [
-                "Do not open or execute the file",
-                "Quarantine the file for analysis",
-                "Run full antivirus scan on the system",
-                "Check for unusual system activity",
-            ],
-            "scam": [
-                "Do not respond to the message",
-                "Block the sender",
-                "Do not share any personal or financial information",
-                "Warn colleagues about similar scam attempts",
-            ],
-            "spam": [
-                "Mark as spam and delete",
-                "Add sender to block list",
-            ]
-        }
+        recommendations = [ESCALATE_RECOMMENDATION] if severity in (SeverityLevel.CRITICAL, SeverityLevel.HIGH) else []
+        recommendations.extend(BASE_RECOMMENDATIONS)
+        recommendations.extend(THREAT_RECOMMENDATIONS.get(threat_type, ()))
         
-        recommendations = base_recommendations + threat_recommendations.get(threat_type, [])
-        
-        if severity in [SeverityLevel.CRITICAL, SeverityLevel.HIGH]:
-            recommendations.insert(0, "IMMEDIATE ACTION REQUIRED - Escalate to CERT-Army")
-            
-        return recommendations[:7]  # Limit to 7 recommendations
+        # Ordered dedupe, then limit to 7 recommendations
+        return list(dict.fromkeys(recommendations))[:7]
 
 
 # Singleton instance
 threat_analyzer = ThreatAnalyzer()
 
 
+# Identical reports (a scam link or message forwarded to many people) reuse a
+# recent analysis instead of re-running the rules or another Gemini call
+ANALYSIS_CACHE_TTL = 3600
+ANALYSIS_CACHE_MAX_SIZE = 10_000
+# Rule-based stand-ins for a failed Gemini call are only kept briefly, so one
+# timeout or rate limit does not pin the weaker analysis for the full hour
+FALLBACK_ANALYSIS_CACHE_TTL = 60
+_analysis_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_analysis_inflight: Dict[tuple, "asyncio.Future[AnalysisResult]"] = {}
+
+
+def _analysis_cache_key(incident_type: IncidentType, content: str, description: Optional[str]) -> tuple:
+    digest = hashlib.blake2b(content.encode(), digest_size=16)
+    digest.update(b"\0")
+    digest.update((description or "").encode())
+    return incident_type.value, digest.digest()
+
+
 async def analyze_threat(
     incident_type: IncidentType,
     content: str,
     description: Optional[str] = None,
     file_info: Optional[Dict[str, Any]] = None
 ) -> AnalysisResult:
-    """Main function to analyze threats"""
-    return await threat_analyzer.analyze_incident(
-        incident_type=incident_type,
-        content=content,
-        description=description,
-        file_info=file_info
-    )
+    """Main function to analyze threats (text inputs are cached, see ANALYSIS_CACHE_TTL)"""
+    if file_info:
+        return await threat_analyzer.analyze_incident(
+            incident_type=incident_type,
+            content=content,
+            description=description,
+            file_info=file_info
+        )
+    
+    key = _analysis_cache_key(incident_type, content, description)
+    cached = _analysis_cache.get(key)
+    if cached and time.monotonic() - cached[0] < cached[2]:
+        _analysis_cache.move_to_end(key)
+        return cached[1]
+    
+    # Concurrent submissions of the same text share one analysis
+    inflight = _analysis_inflight.get(key)
+    if inflight is None:
+        inflight = asyncio.ensure_future(threat_analyzer._analyze_incident(
+            incident_type=incident_type,
+            content=content,
+            description=description
+        ))
+        _analysis_inflight[key] = inflight
+        inflight.add_done_callback(lambda _: _analysis_inflight.pop(key, None))
+    
+    result, fell_back = await asyncio.shield(inflight)
+    
+    ttl = FALLBACK_ANALYSIS_CACHE_TTL if fell_back else ANALYSIS_CACHE_TTL
+    _analysis_cache[key] = (time.monotonic(), result, ttl)
+    _analysis_cache.move_to_end(key)
+    if len(_analysis_cache) > ANALYSIS_CACHE_MAX_SIZE:
+        _analysis_cache.popitem(last=False)
+    
+    return result
@@ -2,58 +2,81 @@
 Analytics Service - Statistics and trends
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Awaitable, Callable, List
 from app.core.database import supabase
 
+SEVERITY_LEVELS = ("critical", "high", "medium", "low")
 
-async def get_incident_stats() -> Dict[str, Any]:
-    """Get incident statistics"""
+# Shown when Supabase is unreachable (demo mode)
+DEMO_RISK_DISTRIBUTION = {
+    "critical": 8,
+    "high": 34,
+    "medium": 52,
+    "low": 33
+}
+
+# Dashboards poll these endpoints from every open tab while the counts change
+# slowly - all callers share one Supabase round trip per STATS_CACHE_TTL
+STATS_CACHE_TTL = 5
+_stats_cache: Dict[tuple, tuple] = {}
+_stats_inflight: Dict[tuple, "asyncio.Future[Any]"] = {}
+
+
+async def _memoized(key: tuple, load: Callable[[], Awaitable[Any]]) -> Any:
+    """Return a recent result for key, or run load once for all concurrent callers"""
+    cached = _stats_cache.get(key)
+    if cached and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+        return cached[1]
+    
+    inflight = _stats_inflight.get(key)
+    if inflight is None:
+        inflight = asyncio.ensure_future(load())
+        _stats_inflight[key] = inflight
+        inflight.add_done_callback(lambda _: _stats_inflight.pop(key, None))
     
+    result = await asyncio.shield(inflight)
+    _stats_cache[key] = (time.monotonic(), result)
+    return result
+
+
+async def _get_severity_counts() -> Dict[str, int]:
+    """Count incidents per severity with one grouped query instead of one COUNT per level"""
+    result = await asyncio.to_thread(
+        lambda: supabase.rpc("incident_counts_by_severity").execute()
+    )
+    
+    severity_counts = dict.fromkeys(SEVERITY_LEVELS, 0)
+    for row in result.data or []:
+        severity_counts[row["severity"]] = row["incident_count"]
+    return severity_counts
+
+
+async def get_incident_stats() -> Dict[str, Any]:
+    """Get incident statistics (cached for STATS_CACHE_TTL)"""
+    return await _memoized(("stats",), _load_incident_stats)
+
+
+async def _load_incident_stats() -> Dict[str, Any]:
+    """Fetch incident statistics from Supabase (demo data when unreachable)"""
     try:
-        # Get total incidents
-        total_result = supabase.table("incidents").select("id", count="exact").execute()
-        total = total_result.count or 0
-        
-        # Get pending count
-        pending_result = supabase.table("incidents").select("id", count="exact").eq("status", "pending").execute()
-        pending = pending_result.count or 0
-        
-        # Get critical count
-        critical_result = supabase.table("incidents").select("id", count="exact").eq("severity", "critical").execute()
-        critical = critical_result.count or 0
-        
-        # Get today's count
+        # All counters and the average come back from one aggregate query
         today = datetime.utcnow().date().isoformat()
-        today_result = supabase.table("incidents").select("id", count="exact").gte("created_at", today).execute()
-        today_count = today_result.count or 0
-        
-        # Get risk distribution
-        severity_counts = {
-            "critical": 0,
-            "high": 0,
-            "medium": 0,
-            "low": 0
-        }
-        
-        for severity in severity_counts.keys():
-            result = supabase.table("incidents").select("id", count="exact").eq("severity", severity).execute()
-            severity_counts[severity] = result.count or 0
+        result = await asyncio.to_thread(
+            lambda: supabase.rpc("incident_stats", {"since": today}).execute()
+        )
+        stats = result.data[0]
         
-        # Calculate average risk score
-        all_incidents = supabase.table("incidents").select("risk_score").execute()
-        if all_incidents.data:
-            scores = [i.get("risk_score", 0) for i in all_incidents.data if i.get("risk_score")]
-            avg_risk = sum(scores) / len(scores) if scores else 0
-        else:
-            avg_risk = 0
+        severity_counts = {level: stats[level] for level in SEVERITY_LEVELS}
         
         return {
-            "total_incidents": total,
-            "pending_count": pending,
-            "critical_count": critical,
-            "analyzed_today": today_count,
-            "average_risk_score": round(avg_risk, 1),
+            "total_incidents": stats["total_incidents"],
+            "pending_count": stats["pending_count"],
+            "critical_count": severity_counts["critical"],
+            "analyzed_today": stats["analyzed_today"],
+            "average_risk_score": round(float(stats["average_risk_score"]), 1),
             "risk_distribution": severity_counts
         }
         
@@ -67,18 +90,17 @@ async def get_incident_stats() -> Dict[str, Any]:
             "critical_count": 8,
             "analyzed_today": 12,
             "average_risk_score": 62.4,
-            "risk_distribution": {
-                "critical": 8,
-                "high": 34,
-                "medium": 52,
-                "low": 33
-            }
+            "risk_distribution": dict(DEMO_RISK_DISTRIBUTION)
         }
 
 
 async def get_trends(period: str = "7d") -> Dict[str, Any]:
-    """Get incident trends over time"""
-    
+    """Get incident trends over time (cached per period for STATS_CACHE_TTL)"""
+    return await _memoized(("trends", period), lambda: _load_trends(period))
+
+
+async def _load_trends(period: str) -> Dict[str, Any]:
+    """Fetch per-day severity counts from Supabase (demo data when unreachable)"""
     # Parse period
     days = 7
     if period == "30d":
@@ -89,36 +111,25 @@ async def get_trends(period: str = "7d") -> Dict[str, Any]:
     try:
         start_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
         
-        result = supabase.table("incidents").select(
-            "created_at, severity"
-        ).gte("created_at", start_date).order("created_at").execute()
+        # Postgres groups by day and severity - at most 4 rows per day come back
+        result = await asyncio.to_thread(
+            lambda: supabase.rpc("incident_trends", {"since": start_date}).execute()
+        )
         
-        # Group by date
+        # Pivot (day, severity, count) rows into one entry per day (rows arrive ordered by day)
         date_groups: Dict[str, Dict[str, int]] = {}
-        
-        for incident in result.data or []:
-            date = incident["created_at"][:10]  # Get YYYY-MM-DD
-            severity = incident.get("severity", "low")
-            
-            if date not in date_groups:
-                date_groups[date] = {"total": 0, "critical": 0, "high": 0, "medium": 0, "low": 0}
-            
-            date_groups[date]["total"] += 1
-            date_groups[date][severity] += 1
-        
-        # Convert to list
-        data = []
-        for date, counts in sorted(date_groups.items()):
-            data.append({
-                "date": date,
-                "count": counts["total"],
-                "severity_breakdown": {
-                    "critical": counts["critical"],
-                    "high": counts["high"],
-                    "medium": counts["medium"],
-                    "low": counts["low"]
-                }
-            })
+        for row in result.data or []:
+            severity_counts = date_groups.setdefault(row["day"], dict.fromkeys(SEVERITY_LEVELS, 0))
+            severity_counts[row["severity"]] = row["incident_count"]
+        
+        data = [
+            {
+                "date": day,
+                "count": sum(severity_counts.values()),
+                "severity_breakdown": severity_counts
+            }
+            for day, severity_counts in date_groups.items()
+        ]
         
         return {
             "period": period,
@@ -129,12 +140,12 @@ async def get_trends(period: str = "7d") -> Dict[str, Any]:
     except Exception as e:
         print(f"Error fetching trends: {e}")
         
-        # Return mock data
+        # Return mock data (walk integer day numbers from a single clock read)
+        first_day = datetime.utcnow().date().toordinal() - days + 1
         mock_data = []
         for i in range(days):
-            date = (datetime.utcnow() - timedelta(days=days-i-1)).strftime("%Y-%m-%d")
             mock_data.append({
-                "date": date,
+                "date": date.fromordinal(first_day + i).isoformat(),
                 "count": 10 + (i % 5) * 3,
                 "severity_breakdown": {
                     "critical": 1 + (i % 2),
@@ -152,12 +163,14 @@ async def get_trends(period: str = "7d") -> Dict[str, Any]:
 
 
 async def get_risk_distribution() -> Dict[str, int]:
-    """Get distribution of incidents by risk level"""
-    
-    stats = await get_incident_stats()
-    return stats.get("risk_distribution", {
-        "critical": 0,
-        "high": 0,
-        "medium": 0,
-        "low": 0
-    })
+    """Get distribution of incidents by risk level (cached for STATS_CACHE_TTL)"""
+    return await _memoized(("risk_distribution",), _load_risk_distribution)
+
+
+async def _load_risk_distribution() -> Dict[str, int]:
+    """Fetch severity counts from Supabase (demo data when unreachable)"""
+    try:
+        return await _get_severity_counts()
+    except Exception as e:
+        print(f"Error fetching risk distribution: {e}")
+        return dict(DEMO_RISK_DISTRIBUTION)
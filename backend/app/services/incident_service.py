@@ -3,27 +3,52 @@ Incident Service - REAL SQLite Database Operations
 No mock data - everything is stored and retrieved from local database!
 """
 
+import asyncio
+import logging
+import time
 import uuid
 import json
 import os
+import msgspec
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from app.core.database import (
     create_incident as db_create_incident,
+    create_incidents_bulk as db_create_incidents_bulk,
+    attach_incident_analysis as db_attach_analysis,
+    set_incident_analysis_status as db_set_analysis_status,
     get_incident_by_id as db_get_incident,
-    get_all_incidents as db_get_all_incidents,
-    get_user_incidents as db_get_user_incidents,
+    query_incidents_summary as db_query_incidents,
     update_incident_status as db_update_status,
     get_incident_stats as db_get_stats
 )
 from app.models.schemas import (
+    IncidentCreate,
     IncidentType, 
     SeverityLevel, 
     IncidentStatus,
+    AnalysisStatus,
     IncidentResponse,
     AnalysisResult
 )
+from app.models.internal import IncidentRecord, AnalysisRecord
+from app.services.ai_analyzer import analyze_threat
+
+log = logging.getLogger("incidents")
+
+
+# Incident detail/analysis lookups are polled by open dashboards - serve them
+# from memory briefly; every write path below drops the cached entry
+INCIDENT_CACHE_TTL = 30
+INCIDENT_CACHE_MAX_SIZE = 1024
+_incident_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _invalidate_incident(incident_id: str):
+    """Drop a cached incident after it is changed"""
+    _incident_cache.pop(incident_id, None)
 
 
 def generate_incident_id() -> str:
@@ -33,6 +58,27 @@ def generate_incident_id() -> str:
     return f"INC-{timestamp}-{random_part}"
 
 
+def _save_report(incident_id: str, report_data: Dict[str, Any]) -> None:
+    """Write an incident report JSON file to the reports folder"""
+    try:
+        reports_dir = Path(__file__).parent.parent.parent / "reports"
+        reports_dir.mkdir(exist_ok=True)
+        
+        report_file = reports_dir / f"{incident_id}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        
+        log.debug("report saved to file: %s", report_file)
+    except Exception as e:
+        log.warning("could not save report to file: %s", e)
+
+
+def _save_reports(reports: List[tuple]) -> None:
+    """Write several (incident_id, report_data) report files from one worker thread"""
+    for incident_id, report_data in reports:
+        _save_report(incident_id, report_data)
+
+
 async def create_incident(
     incident_type: IncidentType,
     content: Optional[str],
@@ -62,35 +108,23 @@ async def create_incident(
     }
     
     # Save to SQLite database
-    result = db_create_incident(incident_data)
+    result = await asyncio.to_thread(db_create_incident, incident_data)
     
-    print(f"✅ REAL incident saved to database: {result['id']}")
+    log.debug("incident saved to database: %s", result["id"])
     
     # Save incident to file in reports folder
-    try:
-        reports_dir = Path(__file__).parent.parent.parent / "reports"
-        reports_dir.mkdir(exist_ok=True)
-        
-        report_file = reports_dir / f"{incident_id}.json"
-        report_data = {
-            "incident_id": incident_id,
-            "db_id": result["id"],
-            "timestamp": datetime.now().isoformat(),
-            "type": incident_type.value,
-            "content": content or "",
-            "description": description,
-            "location": location,
-            "file_url": file_url,
-            "user_id": user_id,
-            "analysis": analysis.model_dump()
-        }
-        
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"📄 Report saved to file: {report_file}")
-    except Exception as e:
-        print(f"⚠️  Warning: Could not save report to file: {e}")
+    await asyncio.to_thread(_save_report, incident_id, {
+        "incident_id": incident_id,
+        "db_id": result["id"],
+        "timestamp": datetime.now().isoformat(),
+        "type": incident_type.value,
+        "content": content or "",
+        "description": description,
+        "location": location,
+        "file_url": file_url,
+        "user_id": user_id,
+        "analysis": analysis.model_dump()
+    })
     
     return {
         "success": True,
@@ -100,6 +134,159 @@ async def create_incident(
     }
 
 
+async def create_incident_pending(
+    incident_type: IncidentType,
+    content: Optional[str],
+    description: Optional[str],
+    location: Optional[str],
+    file_url: Optional[str],
+    user_id: Optional[str]
+) -> Dict[str, Any]:
+    """Insert an incident before its analysis is ready so both can run concurrently"""
+    
+    incident_data = {
+        "type": incident_type.value,
+        "content": content or "",
+        "description": description,
+        "location": location,
+        "evidence_files": [file_url] if file_url else [],
+        "reported_by": user_id,
+        "risk_score": 0,
+        "severity": SeverityLevel.LOW.value,
+        "status": IncidentStatus.PENDING.value,
+        "analysis_status": AnalysisStatus.PENDING.value,
+        "indicators": [],
+        "recommendations": [],
+    }
+    
+    result = await asyncio.to_thread(db_create_incident, incident_data)
+    
+    log.debug("incident saved to database (awaiting analysis): %s", result["id"])
+    
+    return {
+        "incident_id": generate_incident_id(),
+        "db_id": result["id"],
+        "type": incident_type.value,
+        "content": content or "",
+        "description": description,
+        "location": location,
+        "file_url": file_url,
+        "user_id": user_id
+    }
+
+
+async def attach_analysis(pending: Dict[str, Any], analysis: AnalysisResult) -> Dict[str, Any]:
+    """Store the analysis for an incident created by create_incident_pending"""
+    
+    _invalidate_incident(pending["db_id"])
+    await asyncio.to_thread(db_attach_analysis, pending["db_id"], {
+        "risk_score": analysis.risk_score,
+        "severity": analysis.severity.value,
+        "indicators": analysis.indicators,
+        "recommendations": analysis.recommendations,
+    })
+    
+    # Save incident to file in reports folder
+    await asyncio.to_thread(_save_report, pending["incident_id"], {
+        **pending,
+        "timestamp": datetime.now().isoformat(),
+        "analysis": analysis.model_dump()
+    })
+    
+    return {
+        "success": True,
+        "incident_id": pending["incident_id"],
+        "db_id": pending["db_id"],
+        "analysis": analysis.model_dump()
+    }
+
+
+async def run_analysis_and_attach(
+    pending: Dict[str, Any],
+    incident_type: IncidentType,
+    content: str,
+    description: Optional[str],
+    file_info: Optional[Dict[str, Any]]
+) -> None:
+    """Background task: analyze a pending incident and store the result"""
+    
+    try:
+        analysis = await analyze_threat(
+            incident_type=incident_type,
+            content=content,
+            description=description,
+            file_info=file_info
+        )
+        await attach_analysis(pending, analysis)
+    except Exception as e:
+        log.error("background analysis failed for %s: %s", pending["db_id"], e, exc_info=True)
+        await mark_analysis_failed(pending)
+
+
+async def mark_analysis_failed(pending: Dict[str, Any]) -> None:
+    """Flag a pending incident whose analysis could not be attached"""
+    await asyncio.to_thread(db_set_analysis_status, pending["db_id"], AnalysisStatus.FAILED.value)
+    _invalidate_incident(pending["db_id"])
+
+
+async def create_incidents_bulk(
+    incidents: List[IncidentCreate],
+    analyses: List[AnalysisResult],
+    user_id: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Create many analyzed incidents in one SQLite transaction - REAL DATA!"""
+    
+    incident_data = [
+        {
+            "type": incident.type.value,
+            "content": incident.content or "",
+            "description": incident.description,
+            "location": incident.location,
+            "evidence_files": [],
+            "reported_by": user_id,
+            "risk_score": analysis.risk_score,
+            "severity": analysis.severity.value,
+            "status": IncidentStatus.PENDING.value,
+            "indicators": analysis.indicators,
+            "recommendations": analysis.recommendations,
+        }
+        for incident, analysis in zip(incidents, analyses)
+    ]
+    
+    results = await asyncio.to_thread(db_create_incidents_bulk, incident_data)
+    
+    log.debug("%d incidents saved to database in one batch", len(results))
+    
+    # Same INC-... ids and report files as a single submission
+    incident_ids = [generate_incident_id() for _ in results]
+    timestamp = datetime.now().isoformat()
+    await asyncio.to_thread(_save_reports, [
+        (incident_id, {
+            "incident_id": incident_id,
+            "db_id": result["id"],
+            "timestamp": timestamp,
+            "type": incident.type.value,
+            "content": incident.content or "",
+            "description": incident.description,
+            "location": incident.location,
+            "file_url": None,
+            "user_id": user_id,
+            "analysis": analysis.model_dump()
+        })
+        for incident_id, result, incident, analysis in zip(incident_ids, results, incidents, analyses)
+    ])
+    
+    return [
+        {
+            "incident_id": incident_id,
+            "db_id": result["id"],
+            "risk_score": result["risk_score"],
+            "severity": result["severity"]
+        }
+        for incident_id, result in zip(incident_ids, results)
+    ]
+
+
 async def get_incidents(
     page: int = 1,
     per_page: int = 20,
@@ -114,58 +301,23 @@ async def get_incidents(
     
     offset = (page - 1) * per_page
     
-    # Get incidents from SQLite
-    if user_id and not is_analyst:
-        all_incidents = db_get_user_incidents(user_id, limit=1000)
-    else:
-        all_incidents = db_get_all_incidents(limit=1000, offset=0)
+    # Reporters only see their own incidents; "all" means no filter
+    filters = {
+        "reported_by": user_id if user_id and not is_analyst else None,
+        "type": incident_type if incident_type and incident_type != "all" else None,
+        "severity": severity if severity and severity != "all" else None,
+        "status": status if status and status != "all" else None,
+    }
     
-    # Apply filters
-    filtered = all_incidents
+    # Filter, count and paginate in SQLite (off the event loop)
+    paginated, total = await asyncio.to_thread(
+        db_query_incidents, filters, search, per_page, offset
+    )
     
-    if incident_type and incident_type != "all":
-        filtered = [i for i in filtered if i.get("type") == incident_type]
-        
-    if severity and severity != "all":
-        filtered = [i for i in filtered if i.get("severity") == severity]
-        
-    if status and status != "all":
-        filtered = [i for i in filtered if i.get("status") == status]
-        
-    if search:
-        search_lower = search.lower()
-        filtered = [i for i in filtered if 
-                   search_lower in (i.get("content") or "").lower() or
-                   search_lower in (i.get("description") or "").lower() or
-                   search_lower in i.get("id", "").lower()]
-    
-    # Paginate
-    total = len(filtered)
-    paginated = filtered[offset:offset + per_page]
-    
-    # Format response
-    incidents = []
-    for row in paginated:
-        incident = {
-            "id": row["id"],
-            "incident_id": row["id"][:18],  # Short ID for display
-            "type": row["type"],
-            "content": row.get("content"),
-            "file_url": row.get("evidence_files", [None])[0] if row.get("evidence_files") else None,
-            "description": row.get("description"),
-            "location": row.get("location"),
-            "risk_score": row.get("risk_score", 0),
-            "severity": row.get("severity", "low"),
-            "status": row.get("status", "pending"),
-            "created_at": row.get("created_at"),
-            "updated_at": row.get("updated_at"),
-            "reported_by": row.get("reported_by") or "Anonymous Reporter",
-            "indicators": row.get("indicators", []),
-            "recommendations": row.get("recommendations", [])
-        }
-        incidents.append(incident)
+    # Rows arrive in IncidentRecord's shape - validate and convert in one call
+    incidents = msgspec.convert(paginated, List[IncidentRecord])
     
-    print(f"📊 Retrieved {len(incidents)} REAL incidents from database")
+    log.debug("retrieved %d incidents from database", len(incidents))
     
     return {
         "incidents": incidents,
@@ -176,29 +328,59 @@ async def get_incidents(
 
 
 async def get_incident_by_id(incident_id: str) -> Optional[Dict[str, Any]]:
-    """Get single incident from SQLite - REAL DATA!"""
+    """Get single incident from SQLite (cached briefly) - REAL DATA!"""
+    
+    cached = _incident_cache.get(incident_id)
+    if cached and time.monotonic() - cached[0] < INCIDENT_CACHE_TTL:
+        _incident_cache.move_to_end(incident_id)
+        return cached[1]
     
-    row = db_get_incident(incident_id)
+    row = await asyncio.to_thread(db_get_incident, incident_id)
     
     if not row:
-        print(f"❌ Incident not found: {incident_id}")
+        log.debug("incident not found: %s", incident_id)
         return None
     
+    result = _format_incident(row)
+    log.debug("retrieved incident %s (analysis %s)", incident_id, result["incident"].analysis_status.value)
+    
+    # Only finished analyses are cached; pending ones change from any worker
+    if result["analysis"] is not None:
+        _incident_cache[incident_id] = (time.monotonic(), result)
+        _incident_cache.move_to_end(incident_id)
+        if len(_incident_cache) > INCIDENT_CACHE_MAX_SIZE:
+            _incident_cache.popitem(last=False)
+    
+    return result
+
+
+def _format_incident(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the incident/analysis response from a decoded database row"""
+    
+    evidence_files = row.get("evidence_files")
     incident = {
         "id": row["id"],
         "incident_id": row["id"][:18],
         "type": row["type"],
         "content": row.get("content"),
-        "file_url": row.get("evidence_files", [None])[0] if row.get("evidence_files") else None,
+        "file_url": evidence_files[0] if evidence_files else None,
         "description": row.get("description"),
         "location": row.get("location"),
         "risk_score": row.get("risk_score", 0),
         "severity": row.get("severity", "low"),
         "status": row.get("status", "pending"),
+        "analysis_status": row.get("analysis_status") or AnalysisStatus.READY.value,
         "created_at": row.get("created_at"),
         "updated_at": row.get("updated_at"),
     }
     
+    # Analysis queued in the background is not available until it is ready
+    if incident["analysis_status"] != AnalysisStatus.READY.value:
+        return {
+            "incident": msgspec.convert(incident, IncidentRecord),
+            "analysis": None
+        }
+    
     analysis = {
         "risk_score": row.get("risk_score", 0),
         "severity": row.get("severity", "low"),
@@ -208,21 +390,20 @@ async def get_incident_by_id(incident_id: str) -> Optional[Dict[str, Any]]:
         "iocs": [],
     }
     
-    print(f"✅ Retrieved REAL incident: {incident_id}")
-    
     return {
-        "incident": incident,
-        "analysis": analysis
+        "incident": msgspec.convert(incident, IncidentRecord),
+        "analysis": msgspec.convert(analysis, AnalysisRecord)
     }
 
 
 async def escalate_incident(incident_id: str, user_id: str) -> bool:
     """Escalate an incident to CERT - REAL UPDATE!"""
     
-    success = db_update_status(incident_id, IncidentStatus.ESCALATED.value)
+    success = await asyncio.to_thread(db_update_status, incident_id, IncidentStatus.ESCALATED.value)
+    _invalidate_incident(incident_id)
     
     if success:
-        print(f"🚨 Incident {incident_id} ESCALATED in database")
+        log.info("incident %s escalated", incident_id)
     
     return success
 
@@ -230,17 +411,17 @@ async def escalate_incident(incident_id: str, user_id: str) -> bool:
 async def update_incident_status(incident_id: str, status: IncidentStatus) -> bool:
     """Update incident status in SQLite - REAL UPDATE!"""
     
-    success = db_update_status(incident_id, status.value)
+    success = await asyncio.to_thread(db_update_status, incident_id, status.value)
+    _invalidate_incident(incident_id)
     
     if success:
-        print(f"✅ Incident {incident_id} status updated to {status.value}")
+        log.debug("incident %s status updated to %s", incident_id, status.value)
     
     return success
 
 
 async def get_stats() -> Dict[str, Any]:
     """Get incident statistics from SQLite - REAL DATA!"""
-    
-    stats = db_get_stats()
-    print(f"📈 Retrieved REAL stats: {stats['total_incidents']} total incidents")
+    stats = await asyncio.to_thread(db_get_stats)
+    log.debug("retrieved stats: %s total incidents", stats["total_incidents"])
     return stats
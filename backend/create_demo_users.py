@@ -7,39 +7,51 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from modules.auth_manager import AuthManager
 
+# Demo accounts (matching the login page)
+DEMO_USERS = [
+    {
+        "label": "Admin",
+        "username": "admin",
+        "email": "admin@rakshanetra.mil",
+        "password": "demo123",
+        "full_name": "System Administrator",
+        "role": "admin",
+        "unit": "Cyber Defence HQ"
+    },
+    {
+        "label": "Reporter",
+        "username": "reporter",
+        "email": "reporter@army.mil",
+        "password": "demo123",
+        "full_name": "Field Reporter",
+        "role": "reporter",
+        "unit": "Delhi Cantonment"
+    }
+]
+
 # Initialize auth manager
 auth = AuthManager(db_path="./auth/users.db")
 
 print("Creating demo users...")
 print("=" * 60)
 
-# Admin user (matching the login page)
-result1 = auth.register_user(
-    username="admin",
-    email="admin@rakshanetra.mil",
-    password="demo123",
-    full_name="System Administrator",
-    role="admin",
-    unit="Cyber Defence HQ"
-)
-if result1["success"]:
-    print("✅ Admin created: admin@rakshanetra.mil / demo123")
-else:
-    print(f"Admin: {result1['message']}")
+# Re-runs skip accounts that already exist; the rest are inserted in one transaction
+pending = []
+for user in DEMO_USERS:
+    if auth.user_exists(user["email"]):
+        print(f"{user['label']}: already exists ({user['email']})")
+    else:
+        pending.append(user)
 
-# Reporter user (matching the login page)
-result2 = auth.register_user(
-    username="reporter",
-    email="reporter@army.mil",
-    password="demo123",
-    full_name="Field Reporter",
-    role="reporter",
-    unit="Delhi Cantonment"
-)
-if result2["success"]:
-    print("✅ Reporter created: reporter@army.mil / demo123")
-else:
-    print(f"Reporter: {result2['message']}")
+if pending:
+    results = auth.bulk_register_users(
+        [{key: value for key, value in user.items() if key != "label"} for user in pending]
+    )
+    for user, result in zip(pending, results):
+        if result["success"]:
+            print(f"✅ {user['label']} created: {user['email']} / {user['password']}")
+        else:
+            print(f"{user['label']}: {result['message']}")
 
 print("=" * 60)
 print("✅ Demo accounts are ready!")
@@ -5,10 +5,36 @@ Automatically evaluates every request with Zero Trust principles
 
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+import asyncio
+import atexit
+import logging
+import re
 import time
 from datetime import datetime
 
+log = logging.getLogger("zero_trust")
+
+# Audit events are queued on the request path and written by a background task
+AUDIT_QUEUE_MAX_SIZE = 10_000
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 0.1  # seconds
+
+# Last known risk assessment per (user, device, ip, action, resource family) and
+# registered device per (user, user agent, ip) - reused instead of recomputed
+RISK_CACHE_TTL = 300
+DEVICE_CACHE_TTL = 900
+ZT_CACHE_MAX_SIZE = 50_000
+
+HTTP_METHOD_ACTIONS = {
+    "GET": "view",
+    "POST": "create",
+    "PUT": "update",
+    "PATCH": "update",
+    "DELETE": "delete"
+}
+
 
 class ZeroTrustMiddleware:
     """
@@ -21,6 +47,21 @@ class ZeroTrustMiddleware:
     def __init__(self, app):
         self.app = app
         
+        # Public endpoints: exact paths plus a few path families, checked with one
+        # set lookup / one regex match instead of a startswith() per entry
+        self._public_exact = frozenset({"/", "/health", "/openapi.json"})
+        self._public_prefix_re = re.compile(r"^/(?:docs|api/auth/(?:login|register))(?:/|$)")
+        
+        # CORS preflights, HEAD probes and static assets never need risk scoring
+        self._skip_methods = frozenset({"OPTIONS", "HEAD"})
+        self._static_prefixes = ("/static", "/assets", "/favicon", "/_next")
+        
+        self._audit_queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=AUDIT_QUEUE_MAX_SIZE)
+        self._audit_flusher: Optional[asyncio.Task] = None
+        
+        self._risk_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._device_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
         # Import zero trust module
         try:
             import sys
@@ -34,10 +75,13 @@ class ZeroTrustMiddleware:
             from modules.audit_logger import audit_logger, AuditEventType
             self.zero_trust = zero_trust
             self.audit_logger = audit_logger
+            self.event_types = AuditEventType
             self.enabled = True
-            print("[ZERO TRUST] ✅ Middleware enabled")
+            # Registered after the audit logger's own close(), so it runs first at exit
+            atexit.register(self.drain_audit_queue)
+            log.info("middleware enabled")
         except Exception as e:
-            print(f"[ZERO TRUST] ❌ Failed to load: {e}")
+            log.error("middleware disabled, failed to load: %s", e)
             self.enabled = False
     
     async def __call__(self, request: Request, call_next):
@@ -47,71 +91,87 @@ class ZeroTrustMiddleware:
             return await call_next(request)
         
         # Skip Zero Trust for public endpoints
-        public_paths = ["/", "/health", "/api/auth/login", "/api/auth/register", "/docs", "/openapi.json"]
-        if any(request.url.path.startswith(path) for path in public_paths):
+        path = request.url.path
+        if path in self._public_exact or self._public_prefix_re.match(path):
+            return await call_next(request)
+        
+        if request.method in self._skip_methods or path.startswith(self._static_prefixes):
             return await call_next(request)
         
         start_time = time.time()
         
         try:
-            # Extract request context
-            user_agent = request.headers.get("user-agent", "Unknown")
-            ip_address = request.client.host if request.client else "Unknown"
-            
-            # Extract device info from headers (sent by frontend)
-            device_info = {
-                "os": request.headers.get("X-Device-OS", "Unknown"),
-                "browser": request.headers.get("X-Device-Browser", "Unknown"),
-                "screen_resolution": request.headers.get("X-Device-Screen", "Unknown"),
-                "timezone": request.headers.get("X-Device-Timezone", "UTC"),
-                "language": request.headers.get("accept-language", "en")[:2]
-            }
-            
             # Get user from request state (set by auth middleware)
-            user_id = getattr(request.state, "user_id", None)
-            username = getattr(request.state, "username", "anonymous")
+            state = request.state
+            user_id = getattr(state, "user_id", None)
             
             if not user_id:
                 # Allow public access but still track
                 response = await call_next(request)
                 return response
             
-            # Register/update device
-            device = self.zero_trust.register_device(
-                user_id=user_id,
-                user_agent=user_agent,
-                ip_address=ip_address,
-                device_info=device_info
-            )
+            username = getattr(state, "username", "anonymous")
+            
+            # Extract request context
+            headers = request.headers
+            client = request.client
+            user_agent = headers.get("user-agent", "Unknown")
+            ip_address = client.host if client else "Unknown"
+            
+            # Register/update device (refreshed once per DEVICE_CACHE_TTL)
+            device_key = (user_id, user_agent, ip_address)
+            device = self._cache_get(self._device_cache, device_key, DEVICE_CACHE_TTL)
+            if device is None:
+                # Extract device info from headers (sent by frontend)
+                device_info = {
+                    "os": headers.get("X-Device-OS", "Unknown"),
+                    "browser": headers.get("X-Device-Browser", "Unknown"),
+                    "screen_resolution": headers.get("X-Device-Screen", "Unknown"),
+                    "timezone": headers.get("X-Device-Timezone", "UTC"),
+                    "language": headers.get("accept-language", "en")[:2]
+                }
+                device = self.zero_trust.register_device(
+                    user_id=user_id,
+                    user_agent=user_agent,
+                    ip_address=ip_address,
+                    device_info=device_info
+                )
+                self._cache_put(self._device_cache, device_key, device)
             
             # Determine action and resource from request
             action = self._map_http_method_to_action(request.method)
-            resource = request.url.path
+            resource = path
+            device_id = device.device_id
             
-            # Get location context (in production, use IP geolocation API)
-            location_context = {
-                "location": {
-                    "city": "Unknown",
-                    "country": "India",  # Default to India for military users
-                    "ip": ip_address
+            # Calculate risk score (/api/incidents/123 shares /api/incidents' entry)
+            resource_family = "/".join(resource.split("/", 3)[:3])
+            risk_key = (user_id, device_id, ip_address, action, resource_family)
+            risk_assessment = self._cache_get(self._risk_cache, risk_key, RISK_CACHE_TTL)
+            if risk_assessment is None:
+                # Get location context (in production, use IP geolocation API)
+                location_context = {
+                    "location": {
+                        "city": "Unknown",
+                        "country": "India",  # Default to India for military users
+                        "ip": ip_address
+                    }
                 }
-            }
-            
-            # Calculate risk score
-            risk_assessment = self.zero_trust.calculate_risk_score(
-                user_id=user_id,
-                device_id=device.device_id,
-                ip_address=ip_address,
-                action=action,
-                resource=resource,
-                context=location_context
-            )
+                
+                risk_assessment = self.zero_trust.calculate_risk_score(
+                    user_id=user_id,
+                    device_id=device_id,
+                    ip_address=ip_address,
+                    action=action,
+                    resource=resource,
+                    context=location_context
+                )
+                self._cache_put(self._risk_cache, risk_key, risk_assessment)
             
             # Check if access should be blocked
             if risk_assessment['risk_score'] >= 70:
                 # Log blocked access
-                self.audit_logger.log_event(
-                    event_type=AuditEventType.ACCESS_DENIED,
+                self._queue_audit_event(
+                    event_type=self.event_types.ACCESS_DENIED,
                     actor=username,
                     action=f"Access denied to {resource}",
                     status="blocked",
@@ -141,7 +201,7 @@ class ZeroTrustMiddleware:
             
             # Add Zero Trust context to request
             request.state.zero_trust = {
-                "device_id": device.device_id,
+                "device_id": device_id,
                 "risk_score": risk_assessment['risk_score'],
                 "risk_level": risk_assessment['risk_level'],
                 "trust_factors": risk_assessment['trust_factors'],
@@ -154,8 +214,8 @@ class ZeroTrustMiddleware:
             
             # Log successful access
             if response.status_code < 400:
-                self.audit_logger.log_event(
-                    event_type=AuditEventType.INCIDENT_VIEWED if "GET" in action else AuditEventType.INCIDENT_CREATED,
+                self._queue_audit_event(
+                    event_type=self.event_types.INCIDENT_VIEWED if "GET" in action else self.event_types.INCIDENT_CREATED,
                     actor=username,
                     action=f"{action} {resource}",
                     status="success",
@@ -164,7 +224,7 @@ class ZeroTrustMiddleware:
                     resource_id=resource,
                     metadata={
                         "risk_score": risk_assessment['risk_score'],
-                        "device_id": device.device_id
+                        "device_id": device_id
                     }
                 )
             
@@ -177,18 +237,71 @@ class ZeroTrustMiddleware:
             
             return response
             
-        except Exception as e:
-            print(f"[ZERO TRUST] Error processing request: {e}")
+        except Exception:
+            log.exception("error processing %s %s", request.method, path)
             # On error, allow request but log
             return await call_next(request)
     
+    @staticmethod
+    def _cache_get(cache: "OrderedDict[tuple, tuple]", key: tuple, ttl: float) -> Any:
+        """Return a cached value younger than ttl, or None"""
+        entry = cache.get(key)
+        if entry and time.monotonic() - entry[0] < ttl:
+            cache.move_to_end(key)
+            return entry[1]
+        return None
+    
+    @staticmethod
+    def _cache_put(cache: "OrderedDict[tuple, tuple]", key: tuple, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        cache[key] = (time.monotonic(), value)
+        cache.move_to_end(key)
+        if len(cache) > ZT_CACHE_MAX_SIZE:
+            cache.popitem(last=False)
+    
+    def _queue_audit_event(self, **event):
+        """Hand an audit event to the background writer instead of writing it inline"""
+        if self._audit_flusher is None or self._audit_flusher.done():
+            self._audit_flusher = asyncio.create_task(self._flush_audit_loop())
+        try:
+            self._audit_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            log.warning("audit queue full, event dropped")
+    
+    async def _flush_audit_loop(self):
+        """Write queued audit events in batches, off the event loop"""
+        while True:
+            batch = [await self._audit_queue.get()]
+            while len(batch) < AUDIT_BATCH_SIZE and not self._audit_queue.empty():
+                batch.append(self._audit_queue.get_nowait())
+            await asyncio.to_thread(self._write_audit_events, batch)
+            # Let the next batch build up
+            await asyncio.sleep(AUDIT_FLUSH_INTERVAL)
+    
+    def _write_audit_events(self, batch: List[Dict[str, Any]]):
+        """Write a batch of audit events in order (keeps the hash chain sequential)"""
+        try:
+            # One transaction for the whole batch
+            self.audit_logger.log_events_bulk(batch)
+            return
+        except Exception as e:
+            log.warning("bulk audit write failed, retrying events one by one: %s", e)
+        
+        for event in batch:
+            try:
+                self.audit_logger.log_event(**event)
+            except Exception as e:
+                log.error("failed to write audit event: %s", e)
+    
+    def drain_audit_queue(self):
+        """Write every audit event still queued (shutdown hook - nothing may be lost)"""
+        batch = []
+        while not self._audit_queue.empty():
+            batch.append(self._audit_queue.get_nowait())
+        if batch:
+            log.info("writing %d queued audit events before shutdown", len(batch))
+            self._write_audit_events(batch)
+    
     def _map_http_method_to_action(self, method: str) -> str:
         """Map HTTP method to action name"""
-        mapping = {
-            "GET": "view",
-            "POST": "create",
-            "PUT": "update",
-            "PATCH": "update",
-            "DELETE": "delete"
-        }
-        return mapping.get(method.upper(), "access")
+        return HTTP_METHOD_ACTIONS.get(method.upper(), "access")
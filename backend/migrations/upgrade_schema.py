@@ -6,142 +6,154 @@ Adds columns for threat repetition, geo-intelligence, escalation, clustering, an
 import sqlite3
 import os
 from datetime import datetime
+from typing import List
+
+try:
+    # Optional: thin wrapper over the SQLite C API, runs multi-statement scripts directly
+    import apsw
+except ImportError:
+    apsw = None
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "rakshanetra.db")
 
 def backup_database():
-    """Create backup before migration"""
+    """Create backup before migration (SQLite online backup - consistent even with open writers)"""
     if os.path.exists(DB_PATH):
         backup_path = f"{DB_PATH}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        import shutil
-        shutil.copy2(DB_PATH, backup_path)
+        try:
+            src = sqlite3.connect(DB_PATH)
+            dst = sqlite3.connect(backup_path)
+            try:
+                # Copy 1000 pages per step so other connections are not locked out
+                src.backup(dst, pages=1000)
+            finally:
+                dst.close()
+                src.close()
+        except sqlite3.Error as e:
+            # Not a readable SQLite database - fall back to a plain file copy
+            print(f"⚠️  Online backup failed ({e}), copying the file instead")
+            import shutil
+            shutil.copy2(DB_PATH, backup_path)
         print(f"✅ Database backed up to: {backup_path}")
         return backup_path
     return None
 
-def upgrade_incidents_table(conn):
-    """Add new columns to incidents table"""
+# New incident columns: (name, type)
+NEW_INCIDENT_COLUMNS = [
+    ("frequency_count", "INTEGER DEFAULT 1"),
+    ("related_incident_ids", "TEXT"),  # JSON array
+    ("cluster_id", "TEXT"),
+    ("geo_region", "TEXT"),
+    ("escalated_flag", "INTEGER DEFAULT 0"),
+    ("escalation_reason", "TEXT"),
+    ("escalate_timestamp", "TEXT"),
+    ("assigned_officer", "TEXT"),
+    ("status_history", "TEXT"),  # JSON array
+    ("military_relevant", "INTEGER DEFAULT 0"),
+    ("fake_profile_detected", "INTEGER DEFAULT 0"),
+    ("unit_name", "TEXT"),
+    ("officer_notes", "TEXT")
+]
+
+THREAT_CLUSTERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS threat_clusters (
+        id TEXT PRIMARY KEY,
+        cluster_type TEXT,
+        cluster_summary TEXT,
+        cluster_size INTEGER DEFAULT 1,
+        first_seen TEXT,
+        last_seen TEXT,
+        sample_incidents TEXT,
+        threat_level TEXT,
+        created_at TEXT
+    )
+"""
+
+INCIDENT_TIMELINE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS incident_timeline (
+        id TEXT PRIMARY KEY,
+        incident_id TEXT NOT NULL,
+        event_type TEXT,
+        event_description TEXT,
+        performed_by TEXT,
+        timestamp TEXT,
+        FOREIGN KEY (incident_id) REFERENCES incidents(id)
+    )
+"""
+
+GEO_STATISTICS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS geo_statistics (
+        id TEXT PRIMARY KEY,
+        region TEXT NOT NULL,
+        date TEXT NOT NULL,
+        incident_count INTEGER DEFAULT 0,
+        high_severity_count INTEGER DEFAULT 0,
+        escalated_count INTEGER DEFAULT 0,
+        updated_at TEXT,
+        UNIQUE(region, date)
+    )
+"""
+
+# Composite/partial indexes shaped after the dashboard and feed queries
+INDEXES = [
+    # status/severity filters ordered by newest first
+    "CREATE INDEX IF NOT EXISTS idx_incidents_status_sev_time ON incidents(status, severity, created_at DESC)",
+    # severity-only counts (stats page)
+    "CREATE INDEX IF NOT EXISTS idx_severity ON incidents(severity)",
+    # created_at range scans (trends, clustering, geo reports)
+    "CREATE INDEX IF NOT EXISTS idx_created_at ON incidents(created_at)",
+    # escalation feed - only escalated rows are indexed
+    "CREATE INDEX IF NOT EXISTS idx_incidents_escalated ON incidents(escalate_timestamp DESC) WHERE escalated_flag = 1",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_geo_time ON incidents(geo_region, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_cluster ON incidents(cluster_id) WHERE cluster_id IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_timeline_incident ON incident_timeline(incident_id)",
+    "CREATE INDEX IF NOT EXISTS idx_geo_stats_region ON geo_statistics(region)",
+    "CREATE INDEX IF NOT EXISTS idx_geo_stats_date ON geo_statistics(date)"
+]
+
+# Single-column indexes replaced by the ones above
+DROPPED_INDEXES = ["idx_cluster_id", "idx_geo_region", "idx_escalated", "idx_status"]
+
+def upgrade_incidents_table(conn) -> List[str]:
+    """ALTER statements for the incident columns that don't exist yet"""
     print("📊 Upgrading incidents table...")
     
-    cursor = conn.cursor()
-    
-    # Get existing columns
-    cursor.execute("PRAGMA table_info(incidents)")
-    existing_columns = [row[1] for row in cursor.fetchall()]
+    # Get existing columns (a set, so each membership test is O(1))
+    existing_columns = {row[1] for row in conn.cursor().execute("PRAGMA table_info(incidents)")}
     
-    # Define new columns to add
-    new_columns = [
-        ("frequency_count", "INTEGER DEFAULT 1"),
-        ("related_incident_ids", "TEXT"),  # JSON array
-        ("cluster_id", "TEXT"),
-        ("geo_region", "TEXT"),
-        ("escalated_flag", "INTEGER DEFAULT 0"),
-        ("escalation_reason", "TEXT"),
-        ("escalate_timestamp", "TEXT"),
-        ("assigned_officer", "TEXT"),
-        ("status_history", "TEXT"),  # JSON array
-        ("military_relevant", "INTEGER DEFAULT 0"),
-        ("fake_profile_detected", "INTEGER DEFAULT 0"),
-        ("unit_name", "TEXT"),
-        ("officer_notes", "TEXT")
-    ]
-    
-    # Add columns that don't exist
-    added_count = 0
-    for col_name, col_type in new_columns:
+    statements = []
+    for col_name, col_type in NEW_INCIDENT_COLUMNS:
         if col_name not in existing_columns:
-            try:
-                cursor.execute(f"ALTER TABLE incidents ADD COLUMN {col_name} {col_type}")
-                print(f"  ✅ Added column: {col_name}")
-                added_count += 1
-            except sqlite3.OperationalError as e:
-                print(f"  ⚠️  Column {col_name} might already exist: {e}")
+            statements.append(f"ALTER TABLE incidents ADD COLUMN {col_name} {col_type}")
+            print(f"  ✅ Adding column: {col_name}")
     
-    conn.commit()
-    print(f"✅ Added {added_count} new columns to incidents table")
+    return statements
 
-def create_threat_clusters_table(conn):
-    """Create threat_clusters table"""
-    print("📊 Creating threat_clusters table...")
-    
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS threat_clusters (
-            id TEXT PRIMARY KEY,
-            cluster_type TEXT,
-            cluster_summary TEXT,
-            cluster_size INTEGER DEFAULT 1,
-            first_seen TEXT,
-            last_seen TEXT,
-            sample_incidents TEXT,
-            threat_level TEXT,
-            created_at TEXT
-        )
-    """)
-    conn.commit()
-    print("✅ threat_clusters table created")
-
-def create_incident_timeline_table(conn):
-    """Create incident_timeline table"""
-    print("📊 Creating incident_timeline table...")
-    
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS incident_timeline (
-            id TEXT PRIMARY KEY,
-            incident_id TEXT NOT NULL,
-            event_type TEXT,
-            event_description TEXT,
-            performed_by TEXT,
-            timestamp TEXT,
-            FOREIGN KEY (incident_id) REFERENCES incidents(id)
-        )
-    """)
-    conn.commit()
-    print("✅ incident_timeline table created")
-
-def create_geo_statistics_table(conn):
-    """Create geo_statistics table"""
-    print("📊 Creating geo_statistics table...")
-    
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS geo_statistics (
-            id TEXT PRIMARY KEY,
-            region TEXT NOT NULL,
-            date TEXT NOT NULL,
-            incident_count INTEGER DEFAULT 0,
-            high_severity_count INTEGER DEFAULT 0,
-            escalated_count INTEGER DEFAULT 0,
-            updated_at TEXT,
-            UNIQUE(region, date)
-        )
-    """)
-    conn.commit()
-    print("✅ geo_statistics table created")
-
-def create_indexes(conn):
-    """Create indexes for better performance"""
+def create_tables() -> List[str]:
+    """CREATE statements for the new tables"""
+    print("📊 Creating threat_clusters, incident_timeline and geo_statistics tables...")
+    return [THREAT_CLUSTERS_TABLE_SQL, INCIDENT_TIMELINE_TABLE_SQL, GEO_STATISTICS_TABLE_SQL]
+
+def create_indexes() -> List[str]:
+    """CREATE INDEX statements for better performance"""
     print("📊 Creating indexes...")
-    
-    indexes = [
-        ("idx_cluster_id", "incidents", "cluster_id"),
-        ("idx_geo_region", "incidents", "geo_region"),
-        ("idx_escalated", "incidents", "escalated_flag"),
-        ("idx_created_at", "incidents", "created_at"),
-        ("idx_status", "incidents", "status"),
-        ("idx_severity", "incidents", "severity"),
-        ("idx_timeline_incident", "incident_timeline", "incident_id"),
-        ("idx_geo_stats_region", "geo_statistics", "region"),
-        ("idx_geo_stats_date", "geo_statistics", "date")
-    ]
-    
-    for idx_name, table_name, column_name in indexes:
-        try:
-            conn.execute(f"CREATE INDEX IF NOT EXISTS {idx_name} ON {table_name}({column_name})")
-            print(f"  ✅ Created index: {idx_name}")
-        except sqlite3.OperationalError as e:
-            print(f"  ⚠️  Index {idx_name} might already exist: {e}")
-    
-    conn.commit()
-    print("✅ Indexes created")
+    return [f"DROP INDEX IF EXISTS {idx_name}" for idx_name in DROPPED_INDEXES] + INDEXES
+
+def connect(db_path: str = DB_PATH):
+    """Open the database with apsw when it is installed, else the stdlib sqlite3 module"""
+    if apsw is not None:
+        return apsw.Connection(db_path)
+    return sqlite3.connect(db_path)
+
+def execute_in_transaction(conn, statements: List[str]):
+    """Run all statements as one script inside a single transaction"""
+    script = ";\n".join(statements) + ";"
+    if apsw is not None and isinstance(conn, apsw.Connection):
+        # apsw executes every statement in the string; `with conn` commits or rolls back
+        with conn:
+            conn.cursor().execute(script)
+    else:
+        conn.executescript("BEGIN IMMEDIATE;\n" + script + "\nCOMMIT;")
 
 def run_migration():
     """Run the complete migration"""
@@ -157,15 +169,18 @@ def run_migration():
         print("❌ Database not found! Please run server.py first to create initial database.")
         return False
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     
     try:
-        # Run all migrations
-        upgrade_incidents_table(conn)
-        create_threat_clusters_table(conn)
-        create_incident_timeline_table(conn)
-        create_geo_statistics_table(conn)
-        create_indexes(conn)
+        # WAL + NORMAL sync: one fsync at checkpoint instead of one per commit
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        
+        # Run all migrations as one script in a single transaction
+        statements = upgrade_incidents_table(conn) + create_tables() + create_indexes()
+        execute_in_transaction(conn, statements)
+        print(f"✅ Applied {len(statements)} schema statements in one transaction")
         
         print("\n" + "="*60)
         print("✅ Migration completed successfully!")
@@ -177,6 +192,8 @@ def run_migration():
         return True
         
     except Exception as e:
+        if isinstance(conn, sqlite3.Connection) and conn.in_transaction:
+            conn.rollback()
         print(f"\n❌ Migration failed: {e}")
         print(f"💾 Database backup available at: {backup_path}")
         return False
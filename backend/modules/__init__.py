@@ -9,6 +9,7 @@ __all__ = [
     'army_profile_detector',
     'threat_clustering',
     'army_ai_context',
+    'keyword_automaton',
     'lifecycle_manager',
     'intelligence_summary',
     'report_generator'
@@ -3,8 +3,20 @@ Army-Aware AI Context Module
 Enhances AI analysis with defence-specific threat patterns and context
 """
 
-from typing import List, Dict, Optional, Tuple
-import re
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional, Tuple
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from string import Template
+
+from modules.keyword_automaton import KeywordAutomaton
+
+log = logging.getLogger("army_ai_context")
 
 # Defence-specific scam patterns
 ARMY_SCAM_PATTERNS = {
@@ -77,6 +89,62 @@ ARMY_SCAM_PATTERNS = {
     }
 }
 
+# Severity levels in increasing order, and each scam pattern's boost as a rank
+SEVERITY_LEVELS = ('low', 'medium', 'high', 'critical')
+_SEVERITY_RANK = {level: rank for rank, level in enumerate(SEVERITY_LEVELS)}
+_PATTERN_SEVERITY_RANK = {
+    pattern_name: _SEVERITY_RANK[pattern_data['severity_boost']]
+    for pattern_name, pattern_data in ARMY_SCAM_PATTERNS.items()
+}
+
+# Extra fields requested in the AI's JSON reply for defence content
+ARMY_JSON_FIELDS = '"military_relevant": <true or false>,\n  "army_scam_type": "<type if detected>",\n  '
+
+# Static parts of the army context block added to the AI prompt
+_ARMY_CONTEXT_HEADER = """
+    
+🎖️ **DEFENCE/MILITARY CONTEXT DETECTED** 🎖️
+
+This content appears to target Indian Defence personnel. Please analyze with special attention to:
+
+📋 **Common Defence-Targeted Scams:**
+1. **CSD Card Scams** - Fake canteen card renewal/application, asking for fees
+2. **Fake Army Recruitment** - Fraudulent job offers, fake rally notifications  
+3. **Rank Impersonation** - Scammers posing as Army officers (Colonel, Major, etc.)
+4. **Cantonment Scams** - Fake gate passes, MES contracts, housing scams
+5. **Honeytrap Attacks** - Social engineering targeting servicemen via friendship/romance
+6. **Pension Scams** - Fake pension verification, ECHS card fraud
+7. **Aadhaar/PAN Linking** - Fake urgent linking messages for defence personnel
+
+"""
+
+_ARMY_CONTEXT_FOOTER = """
+🔍 **ANALYSIS INSTRUCTIONS FOR DEFENCE CONTENT:**
+
+1. **If Defence-Related Scam Detected:**
+   - Set risk_score minimum to 70 (high threat to defence personnel)
+   - Upgrade severity to at least "high"
+   - Set military_relevant: true
+   - Add specific defence recommendations
+
+2. **Red Flags for Defence Personnel:**
+   - Money requests from "officers" or "defence officials"
+   - Urgent calls to action related to service matters
+   - Unofficial communication channels for official matters
+   - Romance/friendship approaches mentioning military service
+   - Unsolicited job offers or tender opportunities
+   - Requests for sensitive information (service number, posting details)
+
+3. **Recommendations Should Include:**
+   - Report to Unit Cyber Cell or Station Security Officer
+   - Verify through official defence channels only
+   - Never share service details with unknown contacts
+   - Be cautious of social media friend requests
+   - Report to defence.cyber@nic.in if Army-related fraud
+
+**Remember:** Defence personnel are high-value targets. Increase threat assessment accordingly.
+"""
+
 # Indian Army ranks hierarchy
 ARMY_RANKS = {
     'commissioned': [
@@ -100,18 +168,219 @@ DEFENCE_ORGS = [
     'Defence Research', 'Military Intelligence', 'RAW'
 ]
 
+# General military vocabulary (lowercase)
+MILITARY_KEYWORDS = (
+    'soldier', 'serviceman', 'veteran', 'military', 'defence',
+    'regiment', 'battalion', 'corps', 'posting', 'deployment'
+)
+
+# All ranks, highest first, and the category each one belongs to
+_ALL_RANKS = (
+    ARMY_RANKS['commissioned'] +
+    ARMY_RANKS['junior_commissioned'] +
+    ARMY_RANKS['other_ranks']
+)
+_RANK_CATEGORIES = {
+    **{rank: 'other_ranks' for rank in ARMY_RANKS['other_ranks']},
+    **{rank: 'junior_commissioned_officer' for rank in ARMY_RANKS['junior_commissioned']},
+    **{rank: 'commissioned_officer' for rank in ARMY_RANKS['commissioned']},
+}
+
+# Every keyword table in one automaton, each hit tagged with the table it came
+# from, so one pass over the text feeds all the detectors:
+#   ('scam', pattern name, position in its keyword list)
+#   ('rank', position in _ALL_RANKS)
+#   ('org', position in DEFENCE_ORGS)
+#   ('keyword', position in MILITARY_KEYWORDS)
+_DETECTION_AUTOMATON = KeywordAutomaton([
+    *((keyword, ('scam', pattern_name, index))
+      for pattern_name, pattern_data in ARMY_SCAM_PATTERNS.items()
+      for index, keyword in enumerate(pattern_data['keywords'])),
+    *((rank, ('rank', index)) for index, rank in enumerate(_ALL_RANKS)),
+    *((org, ('org', index)) for index, org in enumerate(DEFENCE_ORGS)),
+    *((keyword, ('keyword', index)) for index, keyword in enumerate(MILITARY_KEYWORDS)),
+])
+
+# Detection results for recently seen content. The prompt, severity and summary
+# helpers each re-run the detectors on the same incident text, and forwarded
+# scams arrive many times. Results are shared - callers must not mutate them.
+DETECTION_CACHE_MAX_SIZE = 4096
+_detection_cache: "OrderedDict[tuple, object]" = OrderedDict()
+_detection_cache_lock = threading.Lock()
+
+def _memoize_by_content(func: Callable) -> Callable:
+    """Cache func(content) in a shared LRU keyed by a digest of the content"""
+    
+    @functools.wraps(func)
+    def wrapper(content: str):
+        key = (func.__name__, hashlib.blake2b(content.encode(), digest_size=16).digest())
+        with _detection_cache_lock:
+            if key in _detection_cache:
+                _detection_cache.move_to_end(key)
+                return _detection_cache[key]
+        
+        result = func(content)
+        with _detection_cache_lock:
+            _detection_cache[key] = result
+            if len(_detection_cache) > DETECTION_CACHE_MAX_SIZE:
+                _detection_cache.popitem(last=False)
+        return result
+    
+    return wrapper
+
+class _SummaryStore:
+    """
+    SQLite key/value store for context summaries, shared by all worker processes
+    
+    Entries survive restarts, so keys are digested with the keyword tables as
+    the blake2b key - editing a table invalidates everything stored before.
+    Values are JSON. The table is trimmed back to the newest max_entries every
+    1000 writes. Any SQLite or filesystem error disables the store for this process instead
+    of failing the analysis.
+    """
+    
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._disabled = False
+        self._writes = 0
+        self._salt = hashlib.blake2b(
+            json.dumps([ARMY_SCAM_PATTERNS, ARMY_RANKS, DEFENCE_ORGS, MILITARY_KEYWORDS]).encode(),
+            digest_size=32
+        ).digest()
+    
+    def key(self, content: str) -> bytes:
+        return hashlib.blake2b(content.encode(), digest_size=16, key=self._salt).digest()
+    
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=1, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS summaries (
+                        key BLOB PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                """)
+                self._conn = conn
+            except (sqlite3.Error, OSError) as e:
+                self._disable(e)
+        return self._conn
+    
+    def _disable(self, error: Exception):
+        log.warning("summary cache disabled: %s", error)
+        self._disabled = True
+        self._conn = None
+    
+    def get(self, key: bytes) -> Optional[Dict]:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT value FROM summaries WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key: bytes, value: Dict):
+        data = json.dumps(value)
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO summaries (key, value) VALUES (?, ?)", (key, data))
+                    # Trim now and then rather than counting rows on every write
+                    self._writes += 1
+                    if self._writes % 1000 == 0:
+                        conn.execute("""
+                            DELETE FROM summaries WHERE rowid <= (
+                                SELECT MAX(rowid) - ? FROM summaries
+                            )
+                        """, (self.max_entries,))
+            except sqlite3.Error as e:
+                self._disable(e)
+    
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute("DELETE FROM summaries")
+            except sqlite3.Error as e:
+                self._disable(e)
+
+# Context summaries are pure functions of the content and incidents get
+# re-analysed (retries, reports, re-classification) - keep them on disk
+SUMMARY_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "army_context.db")
+SUMMARY_CACHE_MAX_ENTRIES = 100_000
+_summary_store = _SummaryStore(SUMMARY_CACHE_PATH, SUMMARY_CACHE_MAX_ENTRIES)
+
+def clear_caches():
+    """Forget memoized detection results (e.g. after editing the keyword tables)"""
+    with _detection_cache_lock:
+        _detection_cache.clear()
+    _summary_store.clear()
+
+@_memoize_by_content
+def detect_all(content: str) -> Tuple[List[Dict], Optional[Dict], List[str], List[str]]:
+    """
+    Run every detector over content in a single pass
+    
+    Returns (scam patterns, rank info, defence orgs, military keywords) in the
+    shapes of detect_army_scam_type, detect_army_rank and detect_defence_org.
+    """
+    scam_hits: Dict[str, set] = {}
+    rank_hits = set()
+    org_hits = set()
+    keyword_hits = set()
+    for hit in _DETECTION_AUTOMATON.iter(content.lower()):
+        kind = hit[0]
+        if kind == 'scam':
+            scam_hits.setdefault(hit[1], set()).add(hit[2])
+        elif kind == 'rank':
+            rank_hits.add(hit[1])
+        elif kind == 'org':
+            org_hits.add(hit[1])
+        else:
+            keyword_hits.add(hit[1])
+    
+    return (
+        _scam_patterns(scam_hits),
+        _rank_info(rank_hits),
+        [DEFENCE_ORGS[index] for index in sorted(org_hits)],
+        [MILITARY_KEYWORDS[index] for index in sorted(keyword_hits)],
+    )
+
 def detect_army_scam_type(content: str) -> List[Dict]:
     """Detect which army scam patterns are present"""
-    content_lower = content.lower()
+    return detect_all(content)[0]
+
+def detect_army_rank(content: str) -> Optional[Dict]:
+    """Detect if content mentions Army ranks"""
+    return detect_all(content)[1]
+
+def detect_defence_org(content: str) -> List[str]:
+    """Detect mentions of defence organizations"""
+    return detect_all(content)[2]
+
+def _scam_patterns(hits: Dict[str, set]) -> List[Dict]:
     detected_patterns = []
-    
     for pattern_name, pattern_data in ARMY_SCAM_PATTERNS.items():
-        matches = []
-        for keyword in pattern_data['keywords']:
-            if keyword.lower() in content_lower:
-                matches.append(keyword)
-        
-        if matches:
+        if pattern_name in hits:
+            # Keywords are reported in their list order
+            keywords = pattern_data['keywords']
+            matches = [keywords[index] for index in sorted(hits[pattern_name])]
             detected_patterns.append({
                 'pattern_type': pattern_name,
                 'description': pattern_data['description'],
@@ -121,32 +390,13 @@ def detect_army_scam_type(content: str) -> List[Dict]:
     
     return detected_patterns
 
-def detect_army_rank(content: str) -> Optional[Dict]:
-    """Detect if content mentions Army ranks"""
-    content_lower = content.lower()
-    
-    all_ranks = (
-        ARMY_RANKS['commissioned'] +
-        ARMY_RANKS['junior_commissioned'] +
-        ARMY_RANKS['other_ranks']
-    )
-    
-    detected_ranks = []
-    for rank in all_ranks:
-        if rank.lower() in content_lower:
-            detected_ranks.append(rank)
+def _rank_info(hits: set) -> Optional[Dict]:
+    detected_ranks = [_ALL_RANKS[index] for index in sorted(hits)]
     
     if detected_ranks:
         # Determine rank category
         highest_rank = detected_ranks[0]
-        category = 'other'
-        
-        if highest_rank in ARMY_RANKS['commissioned']:
-            category = 'commissioned_officer'
-        elif highest_rank in ARMY_RANKS['junior_commissioned']:
-            category = 'junior_commissioned_officer'
-        elif highest_rank in ARMY_RANKS['other_ranks']:
-            category = 'other_ranks'
+        category = _RANK_CATEGORIES.get(highest_rank, 'other')
         
         return {
             'detected_ranks': detected_ranks,
@@ -157,146 +407,96 @@ def detect_army_rank(content: str) -> Optional[Dict]:
     
     return None
 
-def detect_defence_org(content: str) -> List[str]:
-    """Detect mentions of defence organizations"""
-    content_lower = content.lower()
-    detected = []
-    
-    for org in DEFENCE_ORGS:
-        if org.lower() in content_lower:
-            detected.append(org)
-    
-    return detected
-
 def is_military_relevant(content: str) -> Tuple[bool, List[str]]:
     """Check if content is relevant to military/defence personnel"""
+    reasons = _relevance_reasons(*detect_all(content))
+    return len(reasons) > 0, reasons
+
+def _relevance_reasons(
+    scam_patterns: List[Dict],
+    rank_info: Optional[Dict],
+    orgs: List[str],
+    found_keywords: List[str]
+) -> List[str]:
     reasons = []
     
     # Check for scam patterns
-    scam_patterns = detect_army_scam_type(content)
     if scam_patterns:
         reasons.append(f"Detected {len(scam_patterns)} defence-specific scam pattern(s)")
     
     # Check for ranks
-    rank_info = detect_army_rank(content)
     if rank_info:
         reasons.append(f"Mentions Army rank: {rank_info['highest_rank']}")
     
     # Check for defence orgs
-    orgs = detect_defence_org(content)
     if orgs:
         reasons.append(f"References defence organization(s): {', '.join(orgs[:3])}")
     
     # Additional military keywords
-    military_keywords = [
-        'soldier', 'serviceman', 'veteran', 'military', 'defence',
-        'regiment', 'battalion', 'corps', 'posting', 'deployment'
-    ]
-    
-    content_lower = content.lower()
-    found_keywords = [kw for kw in military_keywords if kw in content_lower]
     if found_keywords:
         reasons.append(f"Contains military keywords: {', '.join(found_keywords[:3])}")
     
-    is_relevant = len(reasons) > 0
-    
-    return is_relevant, reasons
+    return reasons
+
+def _highest_severity(scam_patterns: List[Dict]) -> str:
+    """Most severe boost among detected patterns (compared by rank, not alphabetically)"""
+    return SEVERITY_LEVELS[max(_PATTERN_SEVERITY_RANK[p['pattern_type']] for p in scam_patterns)]
 
 def enhance_ai_prompt_with_army_context(content: str, content_type: str, base_prompt: str) -> str:
-    """Add defence-specific context to AI analysis prompt"""
+    """
+    Fill an AI prompt template, adding defence-specific context when relevant
     
-    # Check military relevance
-    is_relevant, relevance_reasons = is_military_relevant(content)
+    base_prompt marks its slots with $content, $content_type, $army_context and
+    $extra_json_fields. All of them are substituted in a single pass, so text
+    inside the reported content is never mistaken for a slot.
+    """
+    prompt = Template(base_prompt)
     
-    if not is_relevant:
-        return base_prompt  # No need to add army context
+    # Detect specific patterns (and so military relevance) in one pass
+    scam_patterns, rank_info, orgs, found_keywords = detect_all(content)
     
-    # Detect specific patterns
-    scam_patterns = detect_army_scam_type(content)
-    rank_info = detect_army_rank(content)
-    orgs = detect_defence_org(content)
+    if not (scam_patterns or rank_info or orgs or found_keywords):
+        # No need to add army context
+        return prompt.safe_substitute(
+            content=content, content_type=content_type, army_context="", extra_json_fields=""
+        )
     
-    # Build army context section
-    army_context = f"""
-    
-🎖️ **DEFENCE/MILITARY CONTEXT DETECTED** 🎖️
-
-This content appears to target Indian Defence personnel. Please analyze with special attention to:
-
-📋 **Common Defence-Targeted Scams:**
-1. **CSD Card Scams** - Fake canteen card renewal/application, asking for fees
-2. **Fake Army Recruitment** - Fraudulent job offers, fake rally notifications  
-3. **Rank Impersonation** - Scammers posing as Army officers (Colonel, Major, etc.)
-4. **Cantonment Scams** - Fake gate passes, MES contracts, housing scams
-5. **Honeytrap Attacks** - Social engineering targeting servicemen via friendship/romance
-6. **Pension Scams** - Fake pension verification, ECHS card fraud
-7. **Aadhaar/PAN Linking** - Fake urgent linking messages for defence personnel
-
-"""
+    # Build army context section (pieces are joined once at the end)
+    parts = [_ARMY_CONTEXT_HEADER]
     
     if scam_patterns:
-        army_context += f"""
+        parts.append("""
 ⚠️ **DETECTED SCAM PATTERNS in this content:**
-"""
+""")
         for pattern in scam_patterns:
-            army_context += f"- {pattern['description']} (Severity: {pattern['severity_boost']})\n"
-            army_context += f"  Matched: {', '.join(pattern['matched_keywords'][:5])}\n"
+            parts.append(f"- {pattern['description']} (Severity: {pattern['severity_boost']})\n")
+            parts.append(f"  Matched: {', '.join(pattern['matched_keywords'][:5])}\n")
     
     if rank_info:
-        army_context += f"""
+        parts.append(f"""
 🎖️ **RANK MENTION DETECTED:**
 - Ranks mentioned: {', '.join(rank_info['detected_ranks'])}
 - Category: {rank_info['category']}
 - ⚠️ WARNING: Scammers often impersonate high-ranking officers
-"""
+""")
     
     if orgs:
-        army_context += f"""
+        parts.append(f"""
 🏛️ **DEFENCE ORGANIZATION REFERENCES:**
 - Organizations: {', '.join(orgs)}
 - Verify if sender has legitimate authority to represent these orgs
-"""
-    
-    army_context += """
-🔍 **ANALYSIS INSTRUCTIONS FOR DEFENCE CONTENT:**
-
-1. **If Defence-Related Scam Detected:**
-   - Set risk_score minimum to 70 (high threat to defence personnel)
-   - Upgrade severity to at least "high"
-   - Set military_relevant: true
-   - Add specific defence recommendations
-
-2. **Red Flags for Defence Personnel:**
-   - Money requests from "officers" or "defence officials"
-   - Urgent calls to action related to service matters
-   - Unofficial communication channels for official matters
-   - Romance/friendship approaches mentioning military service
-   - Unsolicited job offers or tender opportunities
-   - Requests for sensitive information (service number, posting details)
-
-3. **Recommendations Should Include:**
-   - Report to Unit Cyber Cell or Station Security Officer
-   - Verify through official defence channels only
-   - Never share service details with unknown contacts
-   - Be cautious of social media friend requests
-   - Report to defence.cyber@nic.in if Army-related fraud
-
-**Remember:** Defence personnel are high-value targets. Increase threat assessment accordingly.
-"""
+""")
     
-    # Inject army context into the base prompt
-    enhanced_prompt = base_prompt.replace(
-        "CONTENT TO ANALYZE:",
-        f"{army_context}\n\nCONTENT TO ANALYZE:"
-    )
+    parts.append(_ARMY_CONTEXT_FOOTER)
+    army_context = "".join(parts)
     
-    # Add military_relevant field to expected JSON output
-    enhanced_prompt = enhanced_prompt.replace(
-        '"detailed_analysis":',
-        '"military_relevant": <true or false>,\n    "army_scam_type": "<type if detected>",\n    "detailed_analysis":'
+    # Inject army context and the military_relevant fields into the template
+    return prompt.safe_substitute(
+        content=content,
+        content_type=content_type,
+        army_context=f"{army_context}\n\n",
+        extra_json_fields=ARMY_JSON_FIELDS
     )
-    
-    return enhanced_prompt
 
 def boost_severity_for_defence_threats(
     ai_result: Dict,
@@ -304,31 +504,23 @@ def boost_severity_for_defence_threats(
 ) -> Dict:
     """Boost severity and risk score for defence-targeted threats"""
     
-    is_relevant, _ = is_military_relevant(content)
+    scam_patterns, rank_info, orgs, found_keywords = detect_all(content)
     
-    if not is_relevant:
+    if not (scam_patterns or rank_info or orgs or found_keywords):
         return ai_result
     
-    scam_patterns = detect_army_scam_type(content)
-    
     # Add military_relevant flag
     ai_result['military_relevant'] = True
     
     if scam_patterns:
         ai_result['army_scam_types'] = [p['description'] for p in scam_patterns]
         
-        # Boost severity based on detected patterns
-        highest_boost = max([p['severity_boost'] for p in scam_patterns])
-        
-        severity_mapping = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
-        boost_mapping = {'medium': 1, 'high': 2, 'critical': 3}
-        
-        current_severity_level = severity_mapping.get(ai_result.get('severity', 'low'), 0)
-        boost_level = boost_mapping.get(highest_boost, 0)
-        
-        new_severity_level = max(current_severity_level, boost_level)
-        reverse_mapping = {0: 'low', 1: 'medium', 2: 'high', 3: 'critical'}
-        ai_result['severity'] = reverse_mapping[new_severity_level]
+        # Boost severity based on detected patterns. A missing or unrecognised
+        # severity ("Critical", "severe") counts as medium, never as low, so the
+        # AI's own verdict is not silently demoted
+        current_rank = _SEVERITY_RANK.get(str(ai_result.get('severity')).lower(), _SEVERITY_RANK['medium'])
+        boost_rank = max(_PATTERN_SEVERITY_RANK[p['pattern_type']] for p in scam_patterns)
+        ai_result['severity'] = SEVERITY_LEVELS[max(current_rank, boost_rank)]
         
         # Boost risk score (minimum 70 for defence threats)
         if ai_result.get('risk_score', 0) < 70:
@@ -355,8 +547,18 @@ def boost_severity_for_defence_threats(
     return ai_result
 
 def generate_army_context_summary(content: str) -> Dict:
-    """Generate complete military context summary for an incident"""
-    is_relevant, reasons = is_military_relevant(content)
+    """Generate complete military context summary for an incident (cached on disk)"""
+    key = _summary_store.key(content)
+    summary = _summary_store.get(key)
+    if summary is None:
+        summary = _build_context_summary(content)
+        _summary_store.set(key, summary)
+    return summary
+
+def _build_context_summary(content: str) -> Dict:
+    scam_patterns, rank_info, orgs, found_keywords = detect_all(content)
+    reasons = _relevance_reasons(scam_patterns, rank_info, orgs, found_keywords)
+    is_relevant = len(reasons) > 0
     
     summary = {
         'military_relevant': is_relevant,
@@ -371,14 +573,12 @@ def generate_army_context_summary(content: str) -> Dict:
         return summary
     
     # Detect patterns
-    scam_patterns = detect_army_scam_type(content)
     if scam_patterns:
         summary['scam_patterns'] = [
             {'type': p['description'], 'severity': p['severity_boost']}
             for p in scam_patterns
         ]
     
-    rank_info = detect_army_rank(content)
     if rank_info:
         summary['rank_mentions'] = {
             'ranks': rank_info['detected_ranks'],
@@ -386,13 +586,12 @@ def generate_army_context_summary(content: str) -> Dict:
             'category': rank_info['category']
         }
     
-    orgs = detect_defence_org(content)
     if orgs:
         summary['defence_orgs'] = orgs
     
     # Overall threat assessment
     if scam_patterns:
-        highest_severity = max([p['severity_boost'] for p in scam_patterns])
+        highest_severity = _highest_severity(scam_patterns)
         summary['threat_assessment'] = highest_severity
     elif rank_info:
         summary['threat_assessment'] = 'medium'
@@ -4,76 +4,108 @@ Detects fake Army profiles and honeytrap attempts
 """
 
 import re
-from typing import Dict, List
+from typing import Dict, List, Sequence
+
+from modules.keyword_automaton import KeywordAutomaton
 
 # Army ranks from army_ai_context
-ARMY_RANKS = [
+ARMY_RANKS = (
     'Field Marshal', 'General', 'Lieutenant General', 'Major General',
     'Brigadier', 'Colonel', 'Lieutenant Colonel', 'Major',
     'Captain', 'Lieutenant', 'Second Lieutenant',
     'Subedar Major', 'Subedar', 'Naib Subedar',
     'Havildar', 'Naik', 'Lance Naik', 'Sepoy'
-]
+)
 
 # Honeytrap patterns
-HONEYTRAP_PATTERNS = [
+HONEYTRAP_PATTERNS = (
     'lonely', 'friendship', 'chatting', 'meet you', 'video call',
     'nice profile', 'want to know you', 'looking for friends',
     'posted at', 'on duty', 'border posting',
     'lets chat', 'can we talk', 'whatsapp', 'telegram',
     'feeling lonely', 'need someone', 'talk to me'
-]
+)
 
 # Romance/social engineering keywords
-ROMANCE_KEYWORDS = [
+ROMANCE_KEYWORDS = (
     'love', 'like you', 'attracted', 'beautiful', 'handsome',
     'marry', 'relationship', 'girlfriend', 'boyfriend',
     'dear', 'darling', 'sweetheart', 'honey'
-]
+)
 
 # Suspicious behavior patterns
 SUSPICIOUS_BEHAVIORS = {
-    'money_request': ['money', 'transfer', 'payment', 'urgent help', 'financial', 'loan', 'bank'],
-    'personal_info': ['aadhaar', 'pan card', 'service number', 'posting details', 'unit name', 'password'],
-    'urgency': ['urgent', 'immediately', 'right now', 'quickly', 'asap'],
-    'military_jargon_wrong': ['posted in', 'duty on', 'regiment no'],  # Wrong usage
+    'money_request': ('money', 'transfer', 'payment', 'urgent help', 'financial', 'loan', 'bank'),
+    'personal_info': ('aadhaar', 'pan card', 'service number', 'posting details', 'unit name', 'password'),
+    'urgency': ('urgent', 'immediately', 'right now', 'quickly', 'asap'),
+    'military_jargon_wrong': ('posted in', 'duty on', 'regiment no'),  # Wrong usage
 }
 
-def detect_army_rank(content: str) -> List[str]:
-    """Detect Army ranks mentioned in content"""
-    content_lower = content.lower()
-    detected = []
-    
-    for rank in ARMY_RANKS:
-        if rank.lower() in content_lower:
-            detected.append(rank)
-    
-    return detected
+# Any 7-12 digit number is a phone candidate; valid Indian phones are the
+# 10-digit ones starting with 6-9
+PHONE_CANDIDATE_RE = re.compile(r'\b\d{7,12}\b')
 
-def detect_honeytrap_patterns(content: str) -> List[str]:
-    """Detect honeytrap/social engineering patterns"""
-    content_lower = content.lower()
-    detected = []
-    
-    for pattern in HONEYTRAP_PATTERNS:
-        if pattern in content_lower:
-            detected.append(pattern)
-    
-    for keyword in ROMANCE_KEYWORDS:
-        if keyword in content_lower:
-            detected.append(keyword)
-    
-    return detected
+# Common scam phrases
+SCAM_PHRASES = (
+    'army wife', 'officer wife', 'posted abroad', 'peacekeeping mission',
+    'coming to India', 'package stuck', 'customs clearance',
+    'need help urgently', 'trust you', 'god bless'
+)
+
+# Every keyword list above in one automaton, built once at import (the lists
+# are tuples so they can't drift from it). Each hit is tagged with the list it
+# came from and its position there: ('rank' | 'honeytrap' | 'romance' |
+# 'scam' | <behavior type>, index)
+_PROFILE_AUTOMATON = KeywordAutomaton([
+    *((rank, ('rank', index)) for index, rank in enumerate(ARMY_RANKS)),
+    *((pattern, ('honeytrap', index)) for index, pattern in enumerate(HONEYTRAP_PATTERNS)),
+    *((keyword, ('romance', index)) for index, keyword in enumerate(ROMANCE_KEYWORDS)),
+    *((phrase, ('scam', index)) for index, phrase in enumerate(SCAM_PHRASES)),
+    *((keyword, (behavior_type, index))
+      for behavior_type, keywords in SUSPICIOUS_BEHAVIORS.items()
+      for index, keyword in enumerate(keywords)),
+])
+
+def _keyword_hits(content_lower: str) -> Dict[str, set]:
+    """Positions of the matched keywords in each list, from one pass over the text"""
+    hits: Dict[str, set] = {}
+    for list_name, index in _PROFILE_AUTOMATON.iter(content_lower):
+        hits.setdefault(list_name, set()).add(index)
+    return hits
+
+def _matched(hits: Dict[str, set], list_name: str, keywords: Sequence[str]) -> List[str]:
+    """Matched keywords of one list, in list order"""
+    return [keywords[index] for index in sorted(hits.get(list_name, ()))]
+
+def _honeytrap(hits: Dict[str, set]) -> List[str]:
+    return _matched(hits, 'honeytrap', HONEYTRAP_PATTERNS) + _matched(hits, 'romance', ROMANCE_KEYWORDS)
+
+def _behaviors(hits: Dict[str, set]) -> Dict[str, List[str]]:
+    return {
+        behavior_type: _matched(hits, behavior_type, keywords)
+        for behavior_type, keywords in SUSPICIOUS_BEHAVIORS.items()
+        if behavior_type in hits
+    }
+
+def detect_army_rank(content_lower: str) -> List[str]:
+    """Detect Army ranks mentioned in already-lowercased content"""
+    return _matched(_keyword_hits(content_lower), 'rank', ARMY_RANKS)
+
+def detect_honeytrap_patterns(content_lower: str) -> List[str]:
+    """Detect honeytrap/social engineering patterns in already-lowercased content"""
+    return _honeytrap(_keyword_hits(content_lower))
 
 def check_phone_format(content: str) -> Dict:
     """Check if phone numbers are in valid Indian format"""
-    # Indian phone: 10 digits starting with 6-9
-    phone_pattern = r'\b[6-9]\d{9}\b'
-    phones = re.findall(phone_pattern, content)
+    phones = []
+    invalid_phones = []
     
-    # Check for invalid formats
-    invalid_phones = re.findall(r'\b\d{7,12}\b', content)
-    invalid_phones = [p for p in invalid_phones if p not in phones]
+    # One scan, each number classified as it is found
+    for number in PHONE_CANDIDATE_RE.findall(content):
+        if len(number) == 10 and number[0] in '6789':
+            phones.append(number)
+        else:
+            invalid_phones.append(number)
     
     return {
         'valid_phones': phones,
@@ -82,17 +114,9 @@ def check_phone_format(content: str) -> Dict:
         'has_invalid': len(invalid_phones) > 0
     }
 
-def detect_suspicious_behaviors(content: str) -> Dict[str, List[str]]:
-    """Detect various suspicious behaviors"""
-    content_lower = content.lower()
-    detected = {}
-    
-    for behavior_type, keywords in SUSPICIOUS_BEHAVIORS.items():
-        found = [kw for kw in keywords if kw in content_lower]
-        if found:
-            detected[behavior_type] = found
-    
-    return detected
+def detect_suspicious_behaviors(content_lower: str) -> Dict[str, List[str]]:
+    """Detect various suspicious behaviors in already-lowercased content"""
+    return _behaviors(_keyword_hits(content_lower))
 
 def detect_fake_army_profile(content: str) -> Dict:
     """
@@ -110,14 +134,18 @@ def detect_fake_army_profile(content: str) -> Dict:
         'reasoning': ''
     }
     
+    # Lowercase once; every keyword list is matched in one pass over it
+    content_lower = content.lower()
+    hits = _keyword_hits(content_lower)
+    
     # 1. Check for Army ranks
-    ranks = detect_army_rank(content)
+    ranks = _matched(hits, 'rank', ARMY_RANKS)
     if ranks:
         result['identified_ranks'] = ranks
         result['confidence'] += 20
     
     # 2. Check for honeytrap/romance patterns
-    honeytrap = detect_honeytrap_patterns(content)
+    honeytrap = _honeytrap(hits)
     if honeytrap:
         result['honeytrap_patterns'] = honeytrap
         result['confidence'] += len(honeytrap) * 10
@@ -138,7 +166,7 @@ def detect_fake_army_profile(content: str) -> Dict:
         result['suspicious_behaviors'].append(f"Invalid phone format: {phone_check['invalid_phones']}")
     
     # 4. Check for money/info requests
-    suspicious = detect_suspicious_behaviors(content)
+    suspicious = _behaviors(hits)
     for behavior_type, keywords in suspicious.items():
         if behavior_type == 'money_request':
             result['confidence'] += 30
@@ -156,13 +184,7 @@ def detect_fake_army_profile(content: str) -> Dict:
         result['suspicious_behaviors'].append("🚨 TRIPLE RED FLAG: Rank impersonation + Romance/friendship + Money request")
     
     # 6. Check for common scam phrases
-    scam_phrases = [
-        'army wife', 'officer wife', 'posted abroad', 'peacekeeping mission',
-        'coming to India', 'package stuck', 'customs clearance',
-        'need help urgently', 'trust you', 'god bless'
-    ]
-    
-    scam_found = [phrase for phrase in scam_phrases if phrase in content.lower()]
+    scam_found = _matched(hits, 'scam', SCAM_PHRASES)
     if scam_found:
         result['confidence'] += len(scam_found) * 15
         result['suspicious_behaviors'].append(f"Common scam phrases: {', '.join(scam_found[:3])}")
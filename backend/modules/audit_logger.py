@@ -9,12 +9,46 @@ import os
 import json
 import hashlib
 import hmac
-from typing import Dict, Any, Optional, List
+import atexit
+import threading
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from pathlib import Path
 import sqlite3
 from enum import Enum
 
+# WAL lets readers run alongside the writer, and synchronous=NORMAL only
+# fsyncs at checkpoints instead of on every commit
+AUDIT_DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+# previous_hash of the first entry in the chain
+GENESIS_HASH = hashlib.sha256(b"RAKSHANETRA_GENESIS_BLOCK").hexdigest()
+
+AUDIT_INSERT_SQL = """
+    INSERT INTO audit_log (
+        event_id, timestamp, event_type, actor, actor_ip,
+        resource_type, resource_id, action, status, details,
+        metadata, previous_hash, current_hash, signature, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# Fields covered by current_hash, in sorted order (the order _canonical_json emits)
+AUDIT_HASHED_FIELDS = (
+    "action", "actor", "actor_ip", "details", "event_id", "event_type",
+    "metadata", "resource_id", "resource_type", "status", "timestamp",
+)
+
+AUDIT_VERIFY_SQL = (
+    "SELECT " + ", ".join(AUDIT_HASHED_FIELDS) +
+    ", previous_hash, current_hash, signature FROM audit_log"
+)
+
 
 class AuditEventType(Enum):
     """Types of security events to audit"""
@@ -82,12 +116,29 @@ class TamperProofAuditLog:
             "AUDIT_SECRET_KEY_CHANGE_IN_PRODUCTION"
         ).encode()
         
+        # One long-lived connection; the lock also keeps the hash chain sequential
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        
         self._init_database()
         self.last_log_hash = self._get_last_log_hash()
+        
+        # JSONL backup, appended through one open handle
+        self._jsonl_file = open(self.json_log_path, 'a', buffering=1 << 16)
+        atexit.register(self.close)
+    
+    def close(self):
+        """Flush the JSONL backup and close the database connection"""
+        with self._lock:
+            if not self._jsonl_file.closed:
+                self._jsonl_file.close()
+            self._conn.close()
     
     def _init_database(self):
         """Initialize SQLite database for audit logs"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
+        for pragma in AUDIT_DB_PRAGMAS:
+            conn.execute(pragma)
         cursor = conn.cursor()
         
         # Main audit log table (append-only)
@@ -143,21 +194,19 @@ class TamperProofAuditLog:
         """)
         
         conn.commit()
-        conn.close()
     
     def _get_last_log_hash(self) -> str:
         """Get hash of last log entry to create chain"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT current_hash FROM audit_log ORDER BY id DESC LIMIT 1")
-        result = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            result = self._conn.execute(
+                "SELECT current_hash FROM audit_log ORDER BY id DESC LIMIT 1"
+            ).fetchone()
         
         if result:
             return result[0]
         else:
             # Genesis hash for first entry
-            return hashlib.sha256(b"RAKSHANETRA_GENESIS_BLOCK").hexdigest()
+            return GENESIS_HASH
     
     def _generate_event_id(self) -> str:
         """Generate unique event ID"""
@@ -167,9 +216,12 @@ class TamperProofAuditLog:
     
     def _calculate_log_hash(self, log_entry: Dict[str, Any]) -> str:
         """Calculate SHA-256 hash of log entry"""
-        # Sort keys for consistent hashing
-        log_str = json.dumps(log_entry, sort_keys=True)
-        return hashlib.sha256(log_str.encode()).hexdigest()
+        return hashlib.sha256(self._canonical_json(log_entry).encode()).hexdigest()
+    
+    @staticmethod
+    def _canonical_json(log_entry: Dict[str, Any]) -> str:
+        """Serialization the entry hash is taken over (sorted keys for consistent hashing)"""
+        return json.dumps(log_entry, sort_keys=True)
     
     def _sign_log_entry(self, log_hash: str, previous_hash: str) -> str:
         """Create HMAC signature for log entry"""
@@ -205,7 +257,49 @@ class TamperProofAuditLog:
         Returns:
             event_id: Unique identifier for this audit entry
         """
+        with self._lock:
+            log_entry, jsonl_line = self._chain_entry(
+                self.last_log_hash, event_type, actor, action, status,
+                actor_ip, resource_type, resource_id, details, metadata
+            )
+            self._store_entries([log_entry], [jsonl_line])
+        return log_entry["event_id"]
+    
+    def log_events_bulk(self, events: List[Dict[str, Any]]) -> List[str]:
+        """
+        Log several events (log_event keyword arguments) in one transaction
         
+        The entries are chained in list order. Returns their event IDs.
+        """
+        if not events:
+            return []
+        
+        with self._lock:
+            entries = []
+            jsonl_lines = []
+            previous_hash = self.last_log_hash
+            for event in events:
+                log_entry, jsonl_line = self._chain_entry(previous_hash, **event)
+                previous_hash = log_entry["current_hash"]
+                entries.append(log_entry)
+                jsonl_lines.append(jsonl_line)
+            self._store_entries(entries, jsonl_lines)
+        return [log_entry["event_id"] for log_entry in entries]
+    
+    def _chain_entry(
+        self,
+        previous_hash: str,
+        event_type: AuditEventType,
+        actor: str,
+        action: str,
+        status: str = "success",
+        actor_ip: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        resource_id: Optional[str] = None,
+        details: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        """Build a signed log entry chained to previous_hash, and its JSONL line"""
         # Generate event ID and timestamp
         event_id = self._generate_event_id()
         timestamp = datetime.utcnow().isoformat()
@@ -214,7 +308,8 @@ class TamperProofAuditLog:
         log_entry = {
             "event_id": event_id,
             "timestamp": timestamp,
-            "event_type": event_type.value if isinstance(event_type, AuditEventType) else event_type,
+            # Enum members are final, so an exact type check is enough (strings pass through)
+            "event_type": event_type.value if type(event_type) is AuditEventType else event_type,
             "actor": actor,
             "action": action,
             "status": status,
@@ -225,9 +320,9 @@ class TamperProofAuditLog:
             "metadata": json.dumps(metadata) if metadata else None
         }
         
-        # Calculate hash chaining
-        current_hash = self._calculate_log_hash(log_entry)
-        previous_hash = self.last_log_hash
+        # Calculate hash chaining - serialized once, for the hash and the JSONL backup
+        canonical = self._canonical_json(log_entry)
+        current_hash = hashlib.sha256(canonical.encode()).hexdigest()
         signature = self._sign_log_entry(current_hash, previous_hash)
         
         log_entry["previous_hash"] = previous_hash
@@ -235,40 +330,36 @@ class TamperProofAuditLog:
         log_entry["signature"] = signature
         log_entry["created_at"] = timestamp
         
-        # Store in database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        # The added values are hex digests and an ISO timestamp - nothing to escape
+        jsonl_line = (
+            f'{canonical[:-1]}, "previous_hash": "{previous_hash}", "current_hash": "{current_hash}", '
+            f'"signature": "{signature}", "created_at": "{timestamp}"}}\n'
+        )
+        return log_entry, jsonl_line
+    
+    def _store_entries(self, entries: List[Dict[str, Any]], jsonl_lines: List[str]):
+        """Insert chained entries in one transaction and append them to the JSONL backup (lock held)"""
         try:
-            cursor.execute("""
-                INSERT INTO audit_log (
-                    event_id, timestamp, event_type, actor, actor_ip,
-                    resource_type, resource_id, action, status, details,
-                    metadata, previous_hash, current_hash, signature, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                event_id, timestamp, log_entry["event_type"], actor, actor_ip,
-                resource_type, resource_id, action, status, details,
-                log_entry["metadata"], previous_hash, current_hash, signature, timestamp
-            ))
-            
-            conn.commit()
+            with self._conn:
+                self._conn.executemany(AUDIT_INSERT_SQL, [
+                    (
+                        e["event_id"], e["timestamp"], e["event_type"], e["actor"], e["actor_ip"],
+                        e["resource_type"], e["resource_id"], e["action"], e["status"], e["details"],
+                        e["metadata"], e["previous_hash"], e["current_hash"], e["signature"], e["created_at"]
+                    )
+                    for e in entries
+                ])
             
             # Update last hash for chain
-            self.last_log_hash = current_hash
-            
-            # Also write to JSONL file (backup)
-            with open(self.json_log_path, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
+            self.last_log_hash = entries[-1]["current_hash"]
             
-            return event_id
+            # Also write to JSONL file (backup) - flushed, but not fsynced, per batch
+            self._jsonl_file.write("".join(jsonl_lines))
+            self._jsonl_file.flush()
             
         except Exception as e:
             print(f"[AUDIT] ❌ Failed to log event: {e}")
-            conn.rollback()
             raise
-        finally:
-            conn.close()
     
     def verify_log_integrity(self, event_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -280,79 +371,66 @@ class TamperProofAuditLog:
         Returns:
             Verification results including any tampering detected
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        query = AUDIT_VERIFY_SQL
+        params: Tuple[Any, ...] = ()
         if event_id:
             # Verify single entry
-            cursor.execute("SELECT * FROM audit_log WHERE event_id = ?", (event_id,))
-            rows = cursor.fetchall()
-        else:
-            # Verify entire chain
-            cursor.execute("SELECT * FROM audit_log ORDER BY id ASC")
-            rows = cursor.fetchall()
+            query += " WHERE event_id = ?"
+            params = (event_id,)
+        query += " ORDER BY id ASC"
         
-        if not rows:
-            return {"valid": False, "error": "No logs found"}
-        
-        columns = [desc[0] for desc in cursor.description]
         tampering_detected = []
-        expected_previous_hash = hashlib.sha256(b"RAKSHANETRA_GENESIS_BLOCK").hexdigest()
+        expected_previous_hash = GENESIS_HASH
+        entries_checked = 0
         
-        for row in rows:
-            log_entry = dict(zip(columns, row))
-            
-            # Reconstruct log data for hashing
-            log_data = {
-                "event_id": log_entry["event_id"],
-                "timestamp": log_entry["timestamp"],
-                "event_type": log_entry["event_type"],
-                "actor": log_entry["actor"],
-                "action": log_entry["action"],
-                "status": log_entry["status"],
-                "actor_ip": log_entry["actor_ip"],
-                "resource_type": log_entry["resource_type"],
-                "resource_id": log_entry["resource_id"],
-                "details": log_entry["details"],
-                "metadata": log_entry["metadata"]
-            }
-            
-            # Verify hash
-            calculated_hash = self._calculate_log_hash(log_data)
-            stored_hash = log_entry["current_hash"]
-            
-            if calculated_hash != stored_hash:
-                tampering_detected.append({
-                    "event_id": log_entry["event_id"],
-                    "issue": "Hash mismatch",
-                    "calculated": calculated_hash,
-                    "stored": stored_hash
-                })
-            
-            # Verify chain
-            if log_entry["previous_hash"] != expected_previous_hash:
-                tampering_detected.append({
-                    "event_id": log_entry["event_id"],
-                    "issue": "Chain broken",
-                    "expected_previous": expected_previous_hash,
-                    "stored_previous": log_entry["previous_hash"]
-                })
-            
-            # Verify signature
-            calculated_sig = self._sign_log_entry(stored_hash, log_entry["previous_hash"])
-            if calculated_sig != log_entry["signature"]:
-                tampering_detected.append({
-                    "event_id": log_entry["event_id"],
-                    "issue": "Signature invalid"
-                })
-            
-            expected_previous_hash = stored_hash
+        # A separate read connection streams a WAL snapshot without holding the
+        # writer lock (and blocking log_event) for the whole pass
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for row in conn.execute(query, params):
+                entries_checked += 1
+                event_id_, previous_hash, stored_hash, signature = row[4], row[11], row[12], row[13]
+                
+                # Hashed fields arrive in sorted key order, so the dict serializes
+                # exactly like _canonical_json without re-sorting
+                calculated_hash = hashlib.sha256(
+                    json.dumps(dict(zip(AUDIT_HASHED_FIELDS, row))).encode()
+                ).hexdigest()
+                
+                if calculated_hash != stored_hash:
+                    tampering_detected.append({
+                        "event_id": event_id_,
+                        "issue": "Hash mismatch",
+                        "calculated": calculated_hash,
+                        "stored": stored_hash
+                    })
+                
+                # Verify chain
+                if previous_hash != expected_previous_hash:
+                    tampering_detected.append({
+                        "event_id": event_id_,
+                        "issue": "Chain broken",
+                        "expected_previous": expected_previous_hash,
+                        "stored_previous": previous_hash
+                    })
+                
+                # Verify signature
+                if self._sign_log_entry(stored_hash, previous_hash) != signature:
+                    tampering_detected.append({
+                        "event_id": event_id_,
+                        "issue": "Signature invalid"
+                    })
+                
+                expected_previous_hash = stored_hash
+        finally:
+            conn.close()
         
-        conn.close()
+        if not entries_checked:
+            return {"valid": False, "error": "No logs found"}
         
         return {
             "valid": len(tampering_detected) == 0,
-            "entries_checked": len(rows),
+            "entries_checked": entries_checked,
             "tampering_detected": tampering_detected,
             "last_verified_hash": expected_previous_hash
         }
@@ -367,14 +445,11 @@ class TamperProofAuditLog:
         """Log failed login attempt for security monitoring"""
         timestamp = datetime.utcnow().isoformat()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO failed_logins (username, ip_address, timestamp, reason, user_agent)
-            VALUES (?, ?, ?, ?, ?)
-        """, (username, ip_address, timestamp, reason, user_agent))
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO failed_logins (username, ip_address, timestamp, reason, user_agent)
+                VALUES (?, ?, ?, ?, ?)
+            """, (username, ip_address, timestamp, reason, user_agent))
         
         # Also log in main audit
         self.log_event(
@@ -396,9 +471,6 @@ class TamperProofAuditLog:
         from datetime import timedelta
         cutoff_time = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         query = "SELECT * FROM failed_logins WHERE timestamp > ?"
         params = [cutoff_time]
         
@@ -412,12 +484,7 @@ class TamperProofAuditLog:
         
         query += " ORDER BY timestamp DESC"
         
-        cursor.execute(query, params)
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return results
+        return self._fetch_dicts(query, params)
     
     def search_logs(
         self,
@@ -430,9 +497,6 @@ class TamperProofAuditLog:
         limit: int = 1000
     ) -> List[Dict[str, Any]]:
         """Search audit logs with filters"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         query = "SELECT * FROM audit_log WHERE 1=1"
         params = []
         
@@ -463,12 +527,14 @@ class TamperProofAuditLog:
         query += " ORDER BY timestamp DESC LIMIT ?"
         params.append(limit)
         
-        cursor.execute(query, params)
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return results
+        return self._fetch_dicts(query, params)
+    
+    def _fetch_dicts(self, query: str, params: List[Any]) -> List[Dict[str, Any]]:
+        """Run a query on the shared connection and return rows as dicts"""
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
 
 # Global audit logger instance
@@ -8,7 +8,7 @@ import hashlib
 import secrets
 import jwt
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -156,6 +156,14 @@ class AuthManager:
         }
         return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     
+    def user_exists(self, email: str) -> bool:
+        """Check whether an account already uses this email"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT 1 FROM users WHERE email = ? LIMIT 1", (email,)).fetchone() is not None
+        finally:
+            conn.close()
+    
     def register_user(
         self,
         username: str,
@@ -170,7 +178,39 @@ class AuthManager:
         Returns: {"success": bool, "user": User, "message": str}
         """
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            result = self._insert_user(conn.cursor(), username, email, password, full_name, role, unit)
+            if result["success"]:
+                conn.commit()
+            return result
+        finally:
+            conn.close()
+    
+    def bulk_register_users(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Register several users in one transaction (one commit for the batch)
+        Each item takes register_user's keyword arguments; returns one result per item
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            results = [self._insert_user(cursor, **user) for user in users]
+            conn.commit()
+            return results
+        finally:
+            conn.close()
+    
+    def _insert_user(
+        self,
+        cursor,
+        username: str,
+        email: str,
+        password: str,
+        full_name: str,
+        role: str = "reporter",
+        unit: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Validate and insert one user on an open cursor (the caller commits)"""
         
         # Validate role
         valid_roles = ["reporter", "admin"]
@@ -180,16 +220,14 @@ class AuthManager:
         # Check if username exists
         cursor.execute("SELECT user_id FROM users WHERE username = ?", (username,))
         if cursor.fetchone():
-            conn.close()
             return {"success": False, "message": "Username already exists"}
         
         # Check if email exists
         cursor.execute("SELECT user_id FROM users WHERE email = ?", (email,))
         if cursor.fetchone():
-            conn.close()
             return {"success": False, "message": "Email already registered"}
         
-        # Create user
+        # Create user (password is only hashed for accounts actually inserted)
         user_id = self._generate_user_id()
         salt = secrets.token_hex(16)
         password_hash = self._hash_password(password, salt)
@@ -205,9 +243,6 @@ class AuthManager:
             role, full_name, unit, created_at, 1
         ))
         
-        conn.commit()
-        conn.close()
-        
         user = User(
             user_id=user_id,
             username=username,
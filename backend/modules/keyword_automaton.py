@@ -0,0 +1,74 @@
+"""
+Keyword Automaton Module
+One-pass multi-keyword matching shared by the defence content detectors
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def trie_branches(words: Iterable[str]) -> List[str]:
+    """
+    Top-level alternatives of a prefix-factored regex for words
+    
+    Shared prefixes are matched once and longer keywords win over their own
+    prefixes, so the engine walks a keyword trie instead of trying every word.
+    The branches are returned unjoined so callers can add their own
+    alternatives and keep re's first-character prefilter.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def branches(node: Dict[str, dict]) -> List[str]:
+        return [re.escape(char) + subpattern(child) for char, child in node.items() if char]
+    
+    def subpattern(node: Dict[str, dict]) -> str:
+        children = branches(node)
+        if not children:
+            return ""
+        pattern = children[0] if len(children) == 1 else "(?:" + "|".join(children) + ")"
+        # Greedy optional: prefer the longer keyword when this node also ends one
+        return "(?:" + pattern + ")?" if "" in node else pattern
+    
+    return branches(trie)
+
+
+class KeywordAutomaton:
+    """
+    Multi-keyword matcher built once at import (Aho-Corasick style)
+    
+    The keywords are compiled into one prefix-factored regex, so a single
+    pass over the text finds them all instead of one substring scan per
+    keyword. Each search restarts one character after the previous hit, and
+    every keyword that is a prefix of the matched one is reported as well, so
+    overlapping keywords ("Subedar" / "Subedar Major") are not lost.
+    
+    Multi-word phrases ("feeling lonely", "peacekeeping mission") are just
+    longer trie paths, so adding phrases doesn't add passes over the text.
+    Matching is by substring, like the `keyword in text` checks it replaced -
+    unlike FlashText it does not require word boundaries ("love" matches
+    inside "glove").
+    """
+    
+    def __init__(self, entries: Iterable[Tuple[str, object]]):
+        values: Dict[str, list] = {}
+        for keyword, value in entries:
+            values.setdefault(keyword.lower(), []).append(value)
+        
+        # Matched keyword -> values of it and of every keyword that is its prefix
+        self._values = {
+            keyword: [value for prefix in values if keyword.startswith(prefix) for value in values[prefix]]
+            for keyword in values
+        }
+        self._regex = re.compile("|".join(trie_branches(values)))
+    
+    def iter(self, content_lower: str) -> Iterator:
+        """Yield the value of every keyword occurrence in already-lowercased text"""
+        match = self._regex.search(content_lower)
+        while match:
+            yield from self._values[match.group()]
+            match = self._regex.search(content_lower, match.start() + 1)
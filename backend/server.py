@@ -81,12 +81,12 @@ def analyze_with_gemini(content: str, content_type: str) -> dict:
         genai.configure(api_key=GEMINI_API_KEY)
         model = genai.GenerativeModel(GEMINI_MODEL)
         
-        # Create comprehensive prompt - no f-string issues
+        # Create comprehensive prompt - $placeholders are filled in one pass below
         prompt_template = """You are a cybersecurity expert AI for RakshaNetra - India's Defence Cyber Safety Portal.
-Analyze this CONTENT_TYPE for potential threats with military-grade precision.
+Analyze this ${content_type} for potential threats with military-grade precision.
 
-CONTENT TO ANALYZE:
-CONTENT_HERE
+${army_context}CONTENT TO ANALYZE:
+${content}
 
 IMPORTANT: Return ONLY valid JSON with NO markdown formatting, NO code blocks, NO extra text.
 
@@ -97,7 +97,7 @@ Return this exact structure:
   "is_threat": true_or_false,
   "threat_type": "phishing or malware or scam or spam or social_engineering or safe",
   "summary": "One sentence threat summary",
-  "detailed_description": "Write 3-4 detailed sentences explaining what this threat is, how it works, why it is dangerous for defence personnel, and what the attacker wants to achieve",
+  ${extra_json_fields}"detailed_description": "Write 3-4 detailed sentences explaining what this threat is, how it works, why it is dangerous for defence personnel, and what the attacker wants to achieve",
   "attack_vector": "email or sms or social_media or url or file",
   "potential_impact": "Data Loss or Credential Theft or Financial Loss or System Compromise or None",
   "indicators": ["Specific red flag 1", "Specific red flag 2", "Specific red flag 3"],
@@ -120,10 +120,8 @@ Scoring Rules:
 
 RETURN ONLY THE JSON OBJECT."""
 
-        prompt = prompt_template.replace('CONTENT_TYPE', content_type).replace('CONTENT_HERE', content)
-        
-        # Enhance with army context
-        prompt = army_ai_context.enhance_ai_prompt_with_army_context(content, content_type, prompt)
+        # Fill in the content and (when relevant) the army context
+        prompt = army_ai_context.enhance_ai_prompt_with_army_context(content, content_type, prompt_template)
 
         print(f"\n📝 Calling Gemini API...")
         response = model.generate_content(
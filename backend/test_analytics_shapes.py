@@ -0,0 +1,108 @@
+"""
+Check the analytics service output against the API response models
+
+The analytics routes wrap service dicts with model_construct (no validation),
+so a drifted key or type would otherwise reach clients unnoticed.
+Run with pytest, or directly: python test_analytics_shapes.py
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+from app.models.schemas import StatsResponse, TrendsResponse, TrendDataPoint, RiskDistribution
+from app.services import analytics_service
+
+# Rows shaped like the incident_stats / incident_trends / incident_counts_by_severity RPCs
+RPC_ROWS = {
+    "incident_stats": [{
+        "total_incidents": 12,
+        "pending_count": 3,
+        "analyzed_today": 2,
+        "average_risk_score": "57.25",
+        "critical": 1,
+        "high": 4,
+        "medium": 5,
+        "low": 2
+    }],
+    "incident_trends": [
+        {"day": "2025-12-01", "severity": "high", "incident_count": 2},
+        {"day": "2025-12-01", "severity": "low", "incident_count": 1},
+        {"day": "2025-12-02", "severity": "critical", "incident_count": 3}
+    ],
+    "incident_counts_by_severity": [
+        {"severity": "critical", "incident_count": 1},
+        {"severity": "medium", "incident_count": 7}
+    ]
+}
+
+
+class FakeSupabase:
+    """Answers rpc() from RPC_ROWS, or fails like an unreachable Supabase"""
+
+    def __init__(self, reachable: bool):
+        self.reachable = reachable
+
+    def rpc(self, name, params=None):
+        if not self.reachable:
+            raise ConnectionError("Supabase unreachable")
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=RPC_ROWS[name]))
+
+
+def _check_shape(data: dict, model) -> None:
+    """Same keys as the model, and every value passes strict validation"""
+    assert set(data) == set(model.model_fields), f"{model.__name__} keys: {sorted(data)}"
+    model.model_validate(data, strict=True)
+
+
+def _run(reachable: bool):
+    analytics_service.supabase = FakeSupabase(reachable)
+    analytics_service._stats_cache.clear()
+    return asyncio.run(_load_all())
+
+
+async def _load_all():
+    return (
+        await analytics_service.get_incident_stats(),
+        await analytics_service.get_trends("7d"),
+        await analytics_service.get_risk_distribution()
+    )
+
+
+def _check_all(stats: dict, trends: dict, distribution: dict) -> None:
+    _check_shape(stats, StatsResponse)
+    _check_shape(stats["risk_distribution"], RiskDistribution)
+
+    _check_shape(trends, TrendsResponse)
+    for point in trends["data"]:
+        _check_shape(point, TrendDataPoint)
+        _check_shape(point["severity_breakdown"], RiskDistribution)
+
+    _check_shape(distribution, RiskDistribution)
+
+
+def test_supabase_results_match_models():
+    stats, trends, distribution = _run(reachable=True)
+    _check_all(stats, trends, distribution)
+
+    assert stats["average_risk_score"] == 57.2
+    assert [point["count"] for point in trends["data"]] == [3, 3]
+    assert distribution == {"critical": 1, "high": 0, "medium": 7, "low": 0}
+
+
+def test_demo_results_match_models():
+    stats, trends, distribution = _run(reachable=False)
+    _check_all(stats, trends, distribution)
+
+    assert len(trends["data"]) == 7
+
+
+if __name__ == "__main__":
+    test_supabase_results_match_models()
+    test_demo_results_match_models()
+    print("✅ Analytics responses match StatsResponse / TrendsResponse / RiskDistribution")
@@ -0,0 +1,63 @@
+"""
+Check that only clean links to trusted hosts get the "trusted website" verdict
+
+urlparse keeps spaces in the host and drops newlines, so malformed input that
+merely ends in a trusted suffix must still be treated as an invalid URL.
+Run with pytest, or directly: python test_trusted_domains.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+from app.models.schemas import IncidentType
+from app.services.ai_analyzer import threat_analyzer, _trusted_domain
+
+TRUSTED_URLS = {
+    "https://www.youtube.com/watch?v=abc": "youtube.com",
+    "indianarmy.nic.in": "indianarmy.nic.in",
+    "https://pay.sbi.co.in/login": "sbi.co.in",
+    "HTTPS://Mail.Google.com": "google.com",
+}
+
+UNTRUSTED_URLS = (
+    "https://sbi-login.tk x.gov.in",
+    "http://secure-login.tk\n.gov.in",
+    "http://secure-login.tk\t.nic.in",
+    "http://verify\r.gov.in/kyc",
+    "https://army-canteen.tk\x00.nic.in",
+    "https://evil-google.com",
+    "https://google.com.attacker.tk",
+    "https://user@xn--sbi-login_.gov.in",
+)
+
+
+def _indicators(url: str):
+    return threat_analyzer._rule_based_analysis(IncidentType.URL, url).indicators
+
+
+def test_clean_trusted_urls_are_trusted():
+    for url, domain in TRUSTED_URLS.items():
+        assert _trusted_domain(url.lower().strip()) == domain, url
+        assert "No threat detected - safe to access" in _indicators(url), url
+
+
+def test_malformed_urls_are_not_trusted():
+    for url in UNTRUSTED_URLS:
+        assert _trusted_domain(url.lower().strip()) is None, repr(url)
+        assert "No threat detected - safe to access" not in _indicators(url), repr(url)
+
+
+def test_whitespace_urls_are_invalid():
+    for url in UNTRUSTED_URLS[:5]:
+        assert "This does not appear to be a valid URL" in _indicators(url), repr(url)
+
+
+if __name__ == "__main__":
+    test_clean_trusted_urls_are_trusted()
+    test_malformed_urls_are_not_trusted()
+    test_whitespace_urls_are_invalid()
+    print("✅ Only clean links to trusted hosts are reported as safe")
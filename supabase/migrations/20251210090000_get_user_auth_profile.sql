@@ -0,0 +1,22 @@
+-- Return a user's role and display name in one round-trip (used by backend login)
+-- Runs as the caller so the existing profiles/user_roles RLS policies still apply
+CREATE OR REPLACE FUNCTION public.get_user_auth_profile(uid UUID)
+RETURNS TABLE (role app_role, full_name TEXT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        (
+            SELECT ur.role
+            FROM public.user_roles ur
+            WHERE ur.user_id = uid
+            ORDER BY ur.role DESC
+            LIMIT 1
+        ),
+        (
+            SELECT p.full_name
+            FROM public.profiles p
+            WHERE p.user_id = uid
+        )
+$$;
@@ -0,0 +1,20 @@
+-- Create/refresh a new user's profile and role in one round-trip (used by backend register)
+-- Both writes run in the function's single transaction; the on_auth_user_created
+-- trigger may already have inserted the rows, so conflicts update instead of failing.
+-- Runs as the caller so the existing profiles/user_roles RLS policies still apply
+CREATE OR REPLACE FUNCTION public.create_user_bootstrap(uid UUID, full_name TEXT, role app_role)
+RETURNS VOID
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+#variable_conflict use_column
+BEGIN
+    INSERT INTO public.profiles (user_id, full_name)
+    VALUES (uid, create_user_bootstrap.full_name)
+    ON CONFLICT (user_id) DO UPDATE SET full_name = EXCLUDED.full_name;
+    
+    INSERT INTO public.user_roles (user_id, role)
+    VALUES (uid, create_user_bootstrap.role)
+    ON CONFLICT (user_id, role) DO NOTHING;
+END;
+$$;
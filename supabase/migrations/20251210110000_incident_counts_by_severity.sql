@@ -0,0 +1,12 @@
+-- Count incidents per severity in one grouped scan (used by backend analytics)
+-- Runs as the caller so the incidents RLS policies still scope what is counted
+CREATE OR REPLACE FUNCTION public.incident_counts_by_severity()
+RETURNS TABLE (severity severity_level, incident_count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT i.severity, COUNT(*)
+    FROM public.incidents i
+    GROUP BY i.severity
+$$;
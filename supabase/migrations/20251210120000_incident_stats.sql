@@ -0,0 +1,29 @@
+-- Dashboard statistics in a single scan (used by backend analytics)
+-- `since` is the start of "today" as the API sees it (UTC midnight)
+-- Runs as the caller so the incidents RLS policies still scope what is counted
+CREATE OR REPLACE FUNCTION public.incident_stats(since TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (
+    total_incidents BIGINT,
+    pending_count BIGINT,
+    analyzed_today BIGINT,
+    critical BIGINT,
+    high BIGINT,
+    medium BIGINT,
+    low BIGINT,
+    average_risk_score NUMERIC
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE i.status = 'pending'),
+        COUNT(*) FILTER (WHERE i.created_at >= incident_stats.since),
+        COUNT(*) FILTER (WHERE i.severity = 'critical'),
+        COUNT(*) FILTER (WHERE i.severity = 'high'),
+        COUNT(*) FILTER (WHERE i.severity = 'medium'),
+        COUNT(*) FILTER (WHERE i.severity = 'low'),
+        COALESCE(AVG(i.risk_score) FILTER (WHERE i.risk_score > 0), 0)
+    FROM public.incidents i
+$$;
@@ -0,0 +1,18 @@
+-- Daily incident counts per severity since a point in time (used by backend analytics)
+-- Days are UTC calendar dates; at most one row per (day, severity)
+-- Runs as the caller so the incidents RLS policies still scope what is counted
+CREATE OR REPLACE FUNCTION public.incident_trends(since TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (day DATE, severity severity_level, incident_count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        (i.created_at AT TIME ZONE 'UTC')::date,
+        COALESCE(i.severity, 'low'),
+        COUNT(*)
+    FROM public.incidents i
+    WHERE i.created_at >= incident_trends.since
+    GROUP BY 1, 2
+    ORDER BY 1
+$$;